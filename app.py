@@ -1,12 +1,46 @@
-from flask import Flask, request, jsonify, render_template_string
+from flask import Flask, request, jsonify, render_template, render_template_string, stream_template, send_file, redirect
+from jinja2 import DictLoader
+from werkzeug.exceptions import RequestEntityTooLarge, ClientDisconnected
+from werkzeug.wsgi import wrap_file
 import datetime
 import base64
 import os
 import json
 import csv
 import io
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, OperationFailure
+import re
+import copy
+import fcntl
+import shutil
+import sqlite3
+import contextlib
+import hashlib
+import threading
+import time
+import zlib
+import tempfile
+import zipfile
+import uuid
+import functools
+import itertools
+import subprocess
+import wave
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import click
+import gridfs
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.errors import ConnectionFailure, OperationFailure, DuplicateKeyError
+from collections import deque, OrderedDict
+import numpy as np
+
+try:
+    # Optional: only needed for the Parquet research export (pip install pyarrow)
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 app = Flask(__name__)
 
@@ -27,11 +61,192 @@ def datetime_filter(timestamp, format='%Y-%m-%d %H:%M'):
     except:
         return 'Unknown'
 
-# File-based storage for Vercel serverless environment (fallback only)
+# File-based storage for Vercel serverless environment (fallback only).
+# Partitioned into one directory per UTC day under FALLBACK_DIR, each a small log-structured
+# store: mutations append records to journal.ndjson, snapshot.json holds the last compaction,
+# and state is rebuilt by replaying the journal over the snapshot. Reads open only the day
+# shards that overlap the requested window, and expiry moves whole shards aside.
+FALLBACK_DIR = '/tmp/sound_drops'
+FALLBACK_ARCHIVE_DIR = '/tmp/sound_drops/archive'
+SHARD_NAME_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+STORAGE_LOCK = threading.Lock()
+SHARD_LOCKS = {}  # Per-day thread locks, so work on one shard never waits on another
+JOURNAL_FSYNC_BATCH = 16  # fsync after this many unsynced records...
+JOURNAL_FSYNC_INTERVAL_SECONDS = 1.0  # ...or when the last fsync is older than this
+JOURNAL_COMPACT_THRESHOLD = 500  # journal records in a shard before a background compaction
+# Change sequence of the file engine (for ?since= delta sync) and tombstones of its deleted drops
+CHANGE_SEQ_FILE = os.path.join(FALLBACK_DIR, 'change_seq')
+TOMBSTONE_FILE = os.path.join(FALLBACK_DIR, 'tombstones.ndjson')
+CHANGE_SEQ_LOCK = threading.Lock()
+# Sequence values (file engine and MongoDB counters) stay pending until the write that carries them
+# has committed, and cursors only advance to just below the oldest pending value, so a write that
+# commits late is never skipped. Pending values of writers that died are ignored after this long.
+SEQUENCE_PENDING_TIMEOUT_SECONDS = 60
+
+# Fallback engine: 'file' (the day shards above) or 'sqlite' (indexed tables in SQLITE_PATH)
+FALLBACK_ENGINE = os.environ.get('SOUNDDROP_FALLBACK_ENGINE', 'file')
+SQLITE_PATH = os.environ.get('SOUNDDROP_SQLITE_PATH', '/tmp/sound_drops.sqlite3')
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS drops (
+    id NOT NULL PRIMARY KEY,
+    timestamp INTEGER NOT NULL,
+    content_hash TEXT,
+    filename TEXT,
+    change_seq INTEGER,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS drops_timestamp ON drops (timestamp);
+CREATE TABLE IF NOT EXISTS discussions (
+    drop_id NOT NULL REFERENCES drops (id) ON DELETE CASCADE,
+    id NOT NULL,
+    timestamp INTEGER,
+    text TEXT,
+    author TEXT,
+    edited INTEGER NOT NULL DEFAULT 0,
+    edited_at INTEGER,
+    PRIMARY KEY (drop_id, id)
+);
+CREATE TABLE IF NOT EXISTS applauds (
+    drop_id NOT NULL PRIMARY KEY REFERENCES drops (id) ON DELETE CASCADE,
+    count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tombstones (
+    drop_id NOT NULL,
+    change_seq INTEGER NOT NULL,
+    deleted_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tombstones_change_seq ON tombstones (change_seq);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT NOT NULL PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+sqlite_local = threading.local()
+
+# Pre-partitioning single-file store, migrated into day shards on first use
 STORAGE_FILE = '/tmp/sound_drops.json'
+LEGACY_JOURNAL_FILE = '/tmp/sound_drops.journal'
+
+# In-memory replay of each day shard, caught up incrementally from its journal
+shard_states = {}
+# Remembered shard of each drop id, so mutations usually open a single shard
+drop_shards = {}
+
+# Research integrity limit on applauds per sound
+MAX_APPLAUDS = 100
+
+# Drops are archived after 7 days; the feed returns the last 30 hours to account for timezone differences
+DROP_RETENTION_MS = 7 * 24 * 60 * 60 * 1000
+FEED_WINDOW_MS = 30 * 60 * 60 * 1000
+
+# Expired drops are moved to the research archive by a background job, never inside a request
+ARCHIVE_BATCH_SIZE = 100
+# Seconds between in-process archiver runs; 0 disables the thread (run `flask archive-expired` instead)
+ARCHIVER_INTERVAL_SECONDS = int(os.environ.get('SOUNDDROP_ARCHIVER_INTERVAL', '0'))
+
+# In-process cache of the active feed. Writes made through this process invalidate it at once;
+# the TTL bounds staleness when another instance writes. SOUNDDROP_FEED_CACHE_TTL=0 disables it.
+FEED_CACHE_TTL_SECONDS = float(os.environ.get('SOUNDDROP_FEED_CACHE_TTL', '5'))
+FEED_CACHE_MAX_ENTRIES = 16
+FEED_CACHE_LOCK = threading.Lock()
+feed_cache = OrderedDict()
+feed_version = 0
+
+# Content-addressed audio storage: GridFS bucket on MongoDB, plain files as fallback
+AUDIO_BUCKET_NAME = 'audio_blobs'
+AUDIO_BLOB_DIR = '/tmp/audio_blobs'
+BLOB_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+# Blobs that lose their drop (rejected near-duplicates, replaced transcodes) are only marked orphaned;
+# the archiver deletes them once they have stayed unreferenced this long, so an ingest of the same
+# bytes that has stored the blob but not yet inserted its drop keeps it
+BLOB_ORPHAN_GRACE_SECONDS = 15 * 60
+# Blobs never change under their digest, so browsers and CDNs may keep them for a year
+AUDIO_CACHE_MAX_AGE_SECONDS = 365 * 24 * 60 * 60
+# Uploads are read and stored in chunks of this size; larger request bodies are rejected with 413
+AUDIO_CHUNK_BYTES = 256 * 1024
+MAX_UPLOAD_BYTES = int(os.environ.get('SOUNDDROP_MAX_UPLOAD_BYTES', str(50 * 1024 * 1024)))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
 
-# Use MongoDB for primary storage on Vercel (file storage is not persistent)
-USE_MONGODB_PRIMARY = True
+# Resumable uploads: one directory per session under UPLOAD_SESSION_DIR holding the bytes received
+# so far (data) and the session state (meta.json). Sessions idle for longer than the TTL are removed.
+UPLOAD_SESSION_DIR = '/tmp/sound_drop_uploads'
+UPLOAD_SESSION_TTL_SECONDS = int(os.environ.get('SOUNDDROP_UPLOAD_SESSION_TTL', str(24 * 60 * 60)))
+MAX_RECORDING_BYTES = int(os.environ.get('SOUNDDROP_MAX_RECORDING_BYTES', str(500 * 1024 * 1024)))
+UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# Ingest transcoding: PCM WAV uploads are downmixed to mono 16-bit and resampled to a voice rate
+# (0 disables it), then optionally encoded with a local ffmpeg. Originals are only kept on request.
+TRANSCODE_SAMPLE_RATE = int(os.environ.get('SOUNDDROP_TRANSCODE_RATE', '16000'))
+TRANSCODE_CODEC = os.environ.get('SOUNDDROP_TRANSCODE_CODEC', '')
+TRANSCODE_CODECS = {
+    'opus': (['-c:a', 'libopus', '-b:a', '24k', '-f', 'ogg'], 'audio/ogg'),
+    'mp3': (['-c:a', 'libmp3lame', '-b:a', '48k', '-f', 'mp3'], 'audio/mpeg'),
+    'aac': (['-c:a', 'aac', '-b:a', '48k', '-f', 'adts'], 'audio/aac'),
+}
+TRANSCODE_TIMEOUT_SECONDS = 300
+KEEP_ORIGINAL_AUDIO = os.environ.get('SOUNDDROP_KEEP_ORIGINAL_AUDIO', '0') != '0'
+# In the background the original is stored and served first, and swapped for the transcode when it is ready
+TRANSCODE_IN_BACKGROUND = os.environ.get('SOUNDDROP_TRANSCODE_IN_BACKGROUND', '0') != '0'
+TRANSCODE_BLOCK_FRAMES = 256 * 1024
+RESAMPLE_FILTER_TAPS = 101
+transcode_executor = None
+# Compressed audio is decoded with the local ffmpeg, to mono at this rate
+DECODE_SAMPLE_RATE = 16000
+
+# Waveform summaries: peak and RMS of each 10 ms window, reduced to at most WAVEFORM_LEVEL_BUCKETS and
+# stored as float16 per audio digest; requests for fewer buckets are downsampled from that level
+WAVEFORM_WINDOW_SECONDS = 0.01
+WAVEFORM_LEVEL_BUCKETS = 2048
+WAVEFORM_DEFAULT_BUCKETS = 200
+WAVEFORM_DIR = '/tmp/audio_waveforms'
+
+# Voice activity: 20 ms frames are speech when their energy clears the noise floor (the 10th percentile
+# frame) by a margin, or half of it with a fricative-like zero-crossing rate. Recordings whose loud frames
+# (90th percentile) clear the floor by less than VAD_MIN_CONTRAST_DB, such as steady tones or traffic,
+# have no silence to tell apart and are left alone. With SOUNDDROP_TRIM_SILENCE, voice-journal recordings
+# (source 'journal', type 'recorded') get leading and trailing silence cut and pauses shortened to
+# MAX_PAUSE_SECONDS (0 keeps them); soundscapes are never trimmed.
+VAD_FRAME_SECONDS = 0.02
+VAD_ENERGY_MARGIN_DB = 12
+VAD_MIN_SPEECH_DB = -50
+VAD_MIN_CONTRAST_DB = 20
+VAD_FRICATIVE_ZCR = 0.25
+VAD_PADDING_SECONDS = 0.2
+TRIM_SILENCE = os.environ.get('SOUNDDROP_TRIM_SILENCE', '0') != '0'
+MAX_PAUSE_SECONDS = float(os.environ.get('SOUNDDROP_MAX_PAUSE_SECONDS', '1.0'))
+
+# Acoustic fingerprints: log band energies of 64 ms frames (16 ms apart) at 8 kHz, pooled into FINGERPRINT_SLICES time
+# slices; each bit is the sign of a band-difference change between neighbouring slices (32 rows x 16 bits).
+# Band levels are floored FINGERPRINT_FLOOR_DB below the loudest band, so pauses and a re-encode's noise
+# floor give the same (all-zero) rows. Every other row doubles as an LSH band: near-duplicates are found
+# by exact row matches on an index, most shared bands first, and confirmed by Hamming distance.
+# Bumping FINGERPRINT_VERSION makes fingerprint-drops recompute stored fingerprints.
+# SOUNDDROP_NEAR_DUPLICATES is 'flag', 'reject' or 'off'.
+FINGERPRINT_SAMPLE_RATE = 8000
+FINGERPRINT_FRAME = 512
+FINGERPRINT_OVERLAP = 4
+FINGERPRINT_HOP = FINGERPRINT_FRAME // FINGERPRINT_OVERLAP
+FINGERPRINT_BANDS = 17
+FINGERPRINT_SLICES = 33
+FINGERPRINT_LOW_HZ, FINGERPRINT_HIGH_HZ = 250, 3800
+FINGERPRINT_FLOOR_DB = 30
+FINGERPRINT_MAX_DISTANCE = 96
+FINGERPRINT_MAX_CANDIDATES = 50
+FINGERPRINT_VERSION = 2
+NEAR_DUPLICATES = os.environ.get('SOUNDDROP_NEAR_DUPLICATES', 'flag')
+
+# Research features: `flask extract-features` decodes archived drops in worker processes and stores
+# duration, loudness, spectral centroid and mel band / MFCC means in audio_features (keyed by drop id),
+# checkpointing the last archive _id it finished. Bumping FEATURES_VERSION re-extracts everything.
+FEATURE_SAMPLE_RATE = 16000
+FEATURE_FRAME = 512
+FEATURE_MEL_BANDS = 20
+FEATURE_MFCC_COUNT = 13
+FEATURES_VERSION = 1
+
+# Use MongoDB for primary storage on Vercel (file storage is not persistent).
+# Set SOUNDDROP_USE_MONGODB=0 to run entirely on the local fallback engine, e.g. for load tests.
+USE_MONGODB_PRIMARY = os.environ.get('SOUNDDROP_USE_MONGODB', '1') != '0'
 
 # MongoDB Configuration for Research Data Archive
 # Replace with your actual MongoDB password
@@ -42,46 +257,1330 @@ MONGODB_DATABASE = "sounddrop_research"
 mongo_client = None
 research_db = None
 
+# Circuit breaker around MongoDB. After a failed connection the breaker opens and every caller
+# goes straight to the fallback storage; once the backoff expires a single caller probes the
+# cluster (half-open) and either closes the breaker or reopens it with a doubled backoff.
+MONGO_BREAKER_BASE_BACKOFF_SECONDS = 5
+MONGO_BREAKER_MAX_BACKOFF_SECONDS = 300
+MONGO_BREAKER_LOCK = threading.Lock()
+mongo_breaker = {
+    'state': 'closed',
+    'consecutive_failures': 0,
+    'retry_at': 0,
+    'last_error': None,
+    'transitions': deque(maxlen=20)
+}
+
+def set_breaker_state(state, reason=None):
+    """Record a breaker transition (caller holds MONGO_BREAKER_LOCK)"""
+    if mongo_breaker['state'] == state:
+        return
+    print(f"MongoDB circuit breaker: {mongo_breaker['state']} -> {state}" + (f" ({reason})" if reason else ""))
+    mongo_breaker['transitions'].append({
+        'from': mongo_breaker['state'],
+        'to': state,
+        'reason': reason,
+        'at': datetime.datetime.now().isoformat()
+    })
+    mongo_breaker['state'] = state
+
+def record_mongo_failure(error):
+    """Open the breaker with exponential backoff after a failed connection or probe"""
+    with MONGO_BREAKER_LOCK:
+        mongo_breaker['consecutive_failures'] += 1
+        backoff = min(
+            MONGO_BREAKER_BASE_BACKOFF_SECONDS * 2 ** (mongo_breaker['consecutive_failures'] - 1),
+            MONGO_BREAKER_MAX_BACKOFF_SECONDS
+        )
+        mongo_breaker['retry_at'] = time.time() + backoff
+        mongo_breaker['last_error'] = str(error)
+        set_breaker_state('open', f"retry in {backoff}s")
+
+def record_mongo_error(error):
+    """Trip the breaker if an operation failed because the cluster is unreachable"""
+    if isinstance(error, ConnectionFailure):
+        record_mongo_failure(error)
+
+def mongo_breaker_status():
+    """Cheap snapshot of the MongoDB health state for the status endpoints"""
+    with MONGO_BREAKER_LOCK:
+        return {
+            'state': mongo_breaker['state'],
+            'consecutive_failures': mongo_breaker['consecutive_failures'],
+            'retry_in_seconds': max(0, round(mongo_breaker['retry_at'] - time.time(), 1)) if mongo_breaker['state'] == 'open' else 0,
+            'last_error': mongo_breaker['last_error'],
+            'transitions': list(mongo_breaker['transitions'])
+        }
+
 def init_mongodb():
     """Initialize MongoDB connection for research data archiving"""
     global mongo_client, research_db
+    if not USE_MONGODB_PRIMARY:
+        return False  # SOUNDDROP_USE_MONGODB=0: no archive, blobs or stats in MongoDB either
+    with MONGO_BREAKER_LOCK:
+        if mongo_breaker['state'] == 'closed' and mongo_client is not None:
+            return True
+        if mongo_breaker['state'] == 'half_open':
+            return False  # Another caller is already probing the cluster
+        if mongo_breaker['state'] == 'open':
+            if time.time() < mongo_breaker['retry_at']:
+                return False
+            set_breaker_state('half_open', 'backoff expired, probing')
+    
     try:
         if mongo_client is None:
             # You need to replace <db_password> with your actual password
             mongo_client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
-            # Test the connection
-            mongo_client.admin.command('ping')
-            research_db = mongo_client[MONGODB_DATABASE]
+        # Test the connection
+        mongo_client.admin.command('ping')
+        first_connection = research_db is None
+        research_db = mongo_client[MONGODB_DATABASE]
+        with MONGO_BREAKER_LOCK:
+            mongo_breaker['consecutive_failures'] = 0
+            set_breaker_state('closed', 'ping succeeded')
+        if first_connection:
             print("MongoDB connection established for research archiving")
+            ensure_indexes()
+            ensure_stats()
         return True
     except Exception as e:
         print(f"MongoDB connection failed: {e}")
+        record_mongo_failure(e)
         return False
 
-def archive_to_research_db(drop_data):
-    """Archive sound drop to MongoDB for research purposes"""
+def ensure_indexes():
+    """Create the indexes the feed, expiry and archive queries rely on (no-op if they exist)"""
+    index_specs = [
+        (research_db.active_sounds, [('id', 1)], {'unique': True, 'name': 'id_unique'}),
+        (research_db.active_sounds, [('timestamp', -1)], {'name': 'timestamp'}),
+        (research_db.active_sounds, [('archived', 1), ('timestamp', -1)], {'name': 'archived_timestamp'}),
+        (research_db.active_sounds, [('contentHash', 1), ('filename', 1)], {
+            'unique': True, 'name': 'content_unique',
+            'partialFilterExpression': {'contentHash': {'$exists': True}}
+        }),
+        (research_db.active_sounds, [('changeSeq', 1)], {'name': 'change_seq'}),
+        (research_db.tombstones, [('changeSeq', 1)], {'name': 'change_seq'}),
+        # Tombstones only need to outlive the drops they stand for
+        (research_db.tombstones, [('deletedAt', 1)], {
+            'name': 'deleted_at_ttl', 'expireAfterSeconds': DROP_RETENTION_MS // 1000
+        }),
+        # Also serves the admin dashboard's keyset pagination on (archived_at, _id)
+        (research_db.sound_drops_archive, [('archived_at', -1), ('_id', -1)], {'name': 'archived_at_id'}),
+        (research_db.sound_drops_archive, [('id', 1)], {'name': 'id'}),
+        (research_db.sound_drops_archive, [('archiveSeq', 1)], {'name': 'archive_seq'}),
+        # Multikey LSH index for near-duplicate candidates
+        (research_db.active_sounds, [('fingerprintBands', 1)], {'name': 'fingerprint_bands', 'sparse': True}),
+        (research_db.sound_drops_archive, [('fingerprintBands', 1)], {'name': 'fingerprint_bands', 'sparse': True}),
+    ]
+    for collection, keys, options in index_specs:
+        try:
+            collection.create_index(keys, **options)
+        except Exception as e:
+            # e.g. legacy duplicate ids prevent the unique index; queries still work without it
+            print(f"Could not create index {options['name']} on {collection.name}: {e}")
+
+def feed_query(now):
+    """Indexed query for the active feed (non-archived drops inside the feed window)"""
+    return {'archived': {'$ne': True}, 'timestamp': {'$gte': now - FEED_WINDOW_MS}}
+
+def committed_sequence(seq, pending):
+    """Highest sequence value below every pending one ({value: start time}) that has not timed out"""
+    cutoff = time.time() - SEQUENCE_PENDING_TIMEOUT_SECONDS
+    live = [int(value) for value, started in pending.items() if started >= cutoff]
+    return min(live) - 1 if live else seq
+
+@contextlib.contextmanager
+def mongo_sequence(name):
+    """Yield the next value of a counters sequence, registered as pending until the block exits"""
+    counters = research_db.counters
+    while True:
+        counter = counters.find_one({'_id': name}) or {}
+        now = time.time()
+        seq = counter.get('seq', 0) + 1
+        update = {'$set': {'seq': seq, f'pending.{seq}': now}}
+        stale = [value for value, started in counter.get('pending', {}).items()
+                 if started < now - SEQUENCE_PENDING_TIMEOUT_SECONDS]
+        if stale:
+            update['$unset'] = {f'pending.{value}': '' for value in stale}
+        try:
+            # Compare-and-set on the value read, so the increment and its pending entry are one write
+            result = counters.update_one({'_id': name, 'seq': counter.get('seq')}, update, upsert=True)
+        except DuplicateKeyError:
+            continue  # Another writer moved the sequence on first
+        if result.matched_count or result.upserted_id is not None:
+            break
     try:
-        if init_mongodb():
-            # Add research metadata
-            research_record = {
-                **drop_data,
-                'archived_at': datetime.datetime.now().isoformat(),
-                'research_status': 'active',
-                'study_phase': 'diary_study_2024'
-            }
-            
-            # Insert into research archive
-            result = research_db.sound_drops_archive.insert_one(research_record)
-            print(f"Archived drop {drop_data['id']} to research database: {result.inserted_id}")
-            return True
+        yield seq
+    finally:
+        counters.update_one({'_id': name}, {'$unset': {f'pending.{seq}': ''}})
+
+def mongo_committed_sequence(name):
+    """Value of a counters sequence up to which every write has committed"""
+    counter = research_db.counters.find_one({'_id': name}) or {}
+    return committed_sequence(counter.get('seq', 0), counter.get('pending', {}))
+
+def expired_query(now):
+    """Indexed query for non-archived drops past the retention period"""
+    return {'archived': {'$ne': True}, 'timestamp': {'$lt': now - DROP_RETENTION_MS}}
+
+def explain_query_plans():
+    """Return the winning plan stages of the hot queries, to verify they use indexes"""
+    def plan_stages(plan):
+        if not plan:
+            return []
+        children = plan.get('inputStages', []) + [plan.get('inputStage')]
+        return [plan.get('stage')] + [stage for child in children for stage in plan_stages(child)]
+    
+    now = datetime.datetime.now().timestamp() * 1000
+    queries = {
+        'feed': research_db.active_sounds.find(feed_query(now), {'_id': 0}).sort('timestamp', -1),
+        'expired': research_db.active_sounds.find(expired_query(now), {'_id': 0}),
+        'drop_by_id': research_db.active_sounds.find(active_drop_filter(0)),
+        'recent_archives': research_db.sound_drops_archive.find({}).sort('archived_at', -1).limit(5),
+    }
+    plans = {}
+    for name, cursor in queries.items():
+        winning_plan = cursor.explain().get('queryPlanner', {}).get('winningPlan', {})
+        # Newer servers nest the classic plan under queryPlan
+        stages = plan_stages(winning_plan.get('queryPlan', winning_plan))
+        plans[name] = {'stages': stages, 'uses_index': 'IXSCAN' in stages or 'IDHACK' in stages}
+    return plans
+
+# Maintained counters (totals, per theme, per type, per UTC day, comments) of the active and archive
+# collections, one research_stats document each, so status reads are a single document lookup.
+# Writes $inc them as they go; `flask rebuild-stats` recounts from scratch.
+STATS_SCOPES = ('active_sounds', 'sound_drops_archive')
+STATS_RECENT_ARCHIVES = 5
+
+def stats_key(value):
+    """Theme or type as a field name ('.' and '$' are not allowed in field names)"""
+    return str(value or 'unknown').replace('.', '_').replace('$', '_')
+
+def stats_increments(drops, sign=1):
+    """$inc document counting drops (or uncounting them, with sign=-1)"""
+    increments = {}
+    def add(field, amount):
+        increments[field] = increments.get(field, 0) + amount
+    for drop in drops:
+        add('total', sign)
+        add(f"by_theme.{stats_key(drop.get('theme'))}", sign)
+        add(f"by_type.{stats_key(drop.get('type'))}", sign)
+        if isinstance(drop.get('timestamp'), (int, float)):
+            add(f"by_day.{shard_for_timestamp(drop['timestamp'])}", sign)
+        add('comments', sign * len(drop.get('discussions') or []))
+    return increments
+
+def update_stats(scope, increments, **update):
+    """Apply counter increments to a scope's stats; until rebuild-stats has created them this is a no-op"""
+    if not increments and not update:
+        return
+    try:
+        research_db.research_stats.update_one({'_id': scope}, {'$inc': increments, **update} if increments else update)
+    except Exception as e:
+        # The counters drift until the next rebuild; the write itself has already succeeded
+        print(f"Stats update for {scope} failed: {e}")
+
+def ensure_stats():
+    """Create the stats of any scope that has none yet: zero for an empty collection, else a recount"""
+    for scope in STATS_SCOPES:
+        try:
+            if research_db.research_stats.find_one({'_id': scope}, {'_id': 1}) is not None:
+                continue
+            if research_db[scope].estimated_document_count() == 0:
+                research_db.research_stats.update_one(
+                    {'_id': scope}, {'$setOnInsert': {'total': 0, 'comments': 0}}, upsert=True
+                )
+            else:
+                print(f"Stats: No counters for {scope} yet, recounting")
+                rebuild_stats(scopes=(scope,))
+        except Exception as e:
+            print(f"Could not initialize stats for {scope}: {e}")
+
+def rebuild_stats(scopes=STATS_SCOPES):
+    """Recount stats documents from their collections (one pass over each collection)
+
+    Each document is replaced in a single write, so counters never disappear while a rebuild runs.
+    """
+    queries = {'active_sounds': {'archived': {'$ne': True}}, 'sound_drops_archive': {}}
+    for scope in scopes:
+        cursor = research_db[scope].find(
+            queries[scope], {'_id': 0, 'theme': 1, 'type': 1, 'timestamp': 1, 'discussions.id': 1}
+        ).batch_size(EXPORT_BATCH_SIZE)
+        stats = {'total': 0, 'comments': 0}
+        for field, value in stats_increments(cursor).items():
+            # by_theme.x -> {'by_theme': {'x': ...}}; stats_key keeps '.' out of the inner names
+            group, _, key = field.partition('.')
+            if key:
+                stats.setdefault(group, {})[key] = value
+            else:
+                stats[group] = value
+        stats['rebuilt_at'] = datetime.datetime.now().isoformat()
+        if scope == 'sound_drops_archive':
+            recent = list(research_db.sound_drops_archive.find(
+                {}, {'_id': 0, 'id': 1, 'archived_at': 1, 'theme': 1, 'type': 1}
+            ).sort([('archived_at', -1), ('_id', -1)]).limit(STATS_RECENT_ARCHIVES))
+            stats['recent'] = recent[::-1]
+        research_db.research_stats.replace_one({'_id': scope}, stats, upsert=True)
+        print(f"Stats: {scope} has {stats['total']} drops")
+
+def stats_snapshot(scope):
+    """Stats of a scope in one lookup; just an estimated_document_count total if they are not maintained yet"""
+    stats = research_db.research_stats.find_one({'_id': scope}, {'_id': 0})
+    if stats is None:
+        return {'total': research_db[scope].estimated_document_count(), 'estimated': True}
+    return stats
+
+def research_record(drop_data, archived_at):
+    """Research archive copy of a drop, with study metadata"""
+    return {
+        **drop_data,
+        'archived_at': archived_at,
+        'research_status': 'active',
+        'study_phase': 'diary_study_2024'
+    }
+
+def archive_drops_batch(drops):
+    """Write a batch of drops to the research archive; re-archiving the same drop is a no-op
+
+    The batch's records share one archiveSeq value, which incremental exports page by.
+    """
+    archived_at = datetime.datetime.now().isoformat()
+    with mongo_sequence('archive_records') as archive_seq:
+        operations = []
+        for drop in drops:
+            record = {key: value for key, value in research_record(drop, archived_at).items() if key != 'id'}
+            record['archiveSeq'] = archive_seq
+            operations.append(UpdateOne({'id': drop['id']}, {'$setOnInsert': record}, upsert=True))
+        result = research_db.sound_drops_archive.bulk_write(operations, ordered=False)
+    inserted = [drops[index] for index in sorted(result.upserted_ids)]
+    if inserted:
+        recent = [{'id': drop['id'], 'archived_at': archived_at, 'theme': drop.get('theme'), 'type': drop.get('type')}
+                  for drop in inserted[-STATS_RECENT_ARCHIVES:]]
+        update_stats('sound_drops_archive', stats_increments(inserted),
+                     **{'$push': {'recent': {'$each': recent, '$slice': -STATS_RECENT_ARCHIVES}}})
+    return result.upserted_count
+
+def archive_expired_drops(batch_size=ARCHIVE_BATCH_SIZE):
+    """Move drops past the retention period into the research archive, in batches
+
+    Safe to run repeatedly or concurrently: archive writes are upserts keyed by drop id,
+    and drops are only marked archived after their archive copy exists.
+    """
+    now = datetime.datetime.now().timestamp() * 1000
+    
+    # Whole fallback day shards past retention are set aside first; this needs no database
+    if FALLBACK_ENGINE == 'file':
+        expire_fallback_shards(now - DROP_RETENTION_MS)
+    prune_fallback_tombstones(now - DROP_RETENTION_MS)
+    expire_upload_sessions()
+    sweep_orphaned_blobs()
+    
+    if not init_mongodb():
+        print("Archiver: MongoDB not available - expired drops stay in place until the next run")
+        return 0
+    
+    started_at = datetime.datetime.now().isoformat()
+    archived_count = 0
+    inserted_count = 0
+    
+    # Active collection: copy to the archive, then flag the whole batch at once
+    collection = research_db.active_sounds
+    while True:
+        batch = list(collection.find(expired_query(now), {'_id': 0}).sort('timestamp', 1).limit(batch_size))
+        if not batch:
+            break
+        inserted_count += archive_drops_batch(batch)
+        result = collection.update_many(
+            {'id': {'$in': [drop['id'] for drop in batch]}},
+            {'$set': {'archived': True, 'archived_at': now}}
+        )
+        archived_count += len(batch)
+        if result.modified_count == len(batch):
+            update_stats('active_sounds', stats_increments(batch, -1))
         else:
-            print("MongoDB not available - skipping archive (this is OK for basic functionality)")
-            return True  # Don't fail the whole operation if MongoDB is down
+            # Some were flagged concurrently; which ones is unknown, so leave it to rebuild-stats
+            update_stats('active_sounds', {}, **{'$set': {'stale': True}})
+        print(f"Archiver: Archived batch of {len(batch)} drops")
+        if result.modified_count == 0:
+            break  # Nothing could be flagged; stop rather than re-reading the same batch
+    
+    # Fallback engine: drops written there while MongoDB was down
+    fallback_archived, fallback_inserted = archive_fallback_drops(now - DROP_RETENTION_MS, batch_size)
+    archived_count += fallback_archived
+    inserted_count += fallback_inserted
+    
+    # Checkpoint for monitoring; the expiry query itself makes every run resumable
+    research_db.archiver_state.update_one(
+        {'_id': 'archiver'},
+        {'$set': {
+            'last_run_started_at': started_at,
+            'last_run_finished_at': datetime.datetime.now().isoformat(),
+            'last_cutoff': now - DROP_RETENTION_MS,
+            'last_archived_count': archived_count
+        }, '$inc': {'archived_total': inserted_count}},
+        upsert=True
+    )
+    print(f"Archiver: Archived {archived_count} expired drops ({inserted_count} new archive records)")
+    return archived_count
+
+def start_archiver_thread(interval_seconds):
+    """Run the archiver periodically in a daemon thread of this process"""
+    def run():
+        while True:
+            try:
+                archive_expired_drops()
+            except Exception as e:
+                print(f"Archiver run failed: {e}")
+            time.sleep(interval_seconds)
+    
+    thread = threading.Thread(target=run, name='sounddrop-archiver', daemon=True)
+    thread.start()
+    print(f"Archiver: Background thread started (every {interval_seconds}s)")
+    return thread
+
+def parse_audio_data_url(audio_data):
+    """Split a base64 data URL into (mime_type, bytes); returns None for plain links"""
+    if not isinstance(audio_data, str) or not audio_data.startswith('data:'):
+        return None
+    header, separator, payload = audio_data.partition(',')
+    if not separator or ';base64' not in header:
+        return None
+    mime_type = header[5:].split(';')[0] or 'application/octet-stream'
+    return mime_type, base64.b64decode(payload)
+
+def get_audio_bucket():
+    """GridFS bucket holding audio blobs (MongoDB must already be initialized)"""
+    return gridfs.GridFSBucket(research_db, bucket_name=AUDIO_BUCKET_NAME)
+
+def read_chunks(stream):
+    while True:
+        chunk = stream.read(AUDIO_CHUNK_BYTES)
+        if not chunk:
+            return
+        yield chunk
+
+def store_gridfs_stream(stream, mime_type):
+    """Stream audio into GridFS under a temporary name, then rename it to its digest (or drop it as a duplicate)"""
+    bucket = get_audio_bucket()
+    digest = hashlib.sha256()
+    size = 0
+    upload = bucket.open_upload_stream(f'upload-{uuid.uuid4().hex}', metadata={'contentType': mime_type})
+    try:
+        for chunk in read_chunks(stream):
+            digest.update(chunk)
+            size += len(chunk)
+            upload.write(chunk)
+        upload.close()
+    except Exception:
+        upload.abort()
+        raise
+    
+    blob_id = digest.hexdigest()
+    # Reusing a stored blob clears its orphan mark, which stops a pending sweep from deleting it
+    reused = research_db[f'{AUDIO_BUCKET_NAME}.files'].update_many(
+        {'filename': blob_id}, {'$unset': {'metadata.orphanedAt': ''}}
+    ).matched_count
+    if not reused:
+        bucket.rename(upload._id, blob_id)
+        print(f"GridFS: Stored audio blob {blob_id[:12]} ({size} bytes)")
+    else:
+        bucket.delete(upload._id)
+    return blob_id, size
+
+@contextlib.contextmanager
+def blob_dir_lock():
+    """Exclusive lock over the file blob store, so reusing and sweeping a blob never interleave"""
+    os.makedirs(AUDIO_BLOB_DIR, exist_ok=True)
+    with open(os.path.join(AUDIO_BLOB_DIR, '.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def store_file_stream(stream, mime_type):
+    """Spool audio to a temporary file in the blob directory, then move it to its digest"""
+    os.makedirs(AUDIO_BLOB_DIR, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, spool_path = tempfile.mkstemp(dir=AUDIO_BLOB_DIR, suffix='.upload')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in read_chunks(stream):
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+    except Exception:
+        os.remove(spool_path)
+        raise
+    
+    blob_id = digest.hexdigest()
+    blob_path = os.path.join(AUDIO_BLOB_DIR, blob_id)
+    with blob_dir_lock():
+        if os.path.exists(blob_path):
+            os.remove(spool_path)
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(blob_path + '.orphaned')
+        else:
+            os.replace(spool_path, blob_path)
+            with open(blob_path + '.type', 'w') as f:
+                f.write(mime_type)
+            print(f"File: Stored audio blob {blob_id[:12]} ({size} bytes)")
+    return blob_id, size
+
+def store_audio_stream(stream, mime_type):
+    """Store audio read in chunks from a seekable file object, once per digest; returns (blob_id, size)"""
+    if init_mongodb():
+        start = stream.tell()
+        try:
+            return store_gridfs_stream(stream, mime_type)
+        except Exception as e:
+            print(f"GridFS upload failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+            stream.seek(start)
+    
+    # Fallback to file storage
+    return store_file_stream(stream, mime_type)
+
+def store_audio_blob(audio_bytes, mime_type):
+    """Store audio bytes once, keyed by their SHA-256 digest, and return the blob id"""
+    return store_audio_stream(io.BytesIO(audio_bytes), mime_type)[0]
+
+def open_audio_blob(blob_id):
+    """Open an audio blob for streaming as (mime_type, size, last_modified, file); returns None if it does not exist"""
+    if not BLOB_ID_PATTERN.match(blob_id or ''):
+        return None
+    if init_mongodb():
+        try:
+            grid_out = get_audio_bucket().open_download_stream_by_name(blob_id)
+            mime_type = (grid_out.metadata or {}).get('contentType', 'application/octet-stream')
+            return mime_type, grid_out.length, grid_out.upload_date, grid_out
+        except gridfs.errors.NoFile:
+            pass
+        except Exception as e:
+            print(f"GridFS download failed, trying file storage: {e}")
+            record_mongo_error(e)
+    
+    blob_path = os.path.join(AUDIO_BLOB_DIR, blob_id)
+    if os.path.exists(blob_path):
+        mime_type = 'application/octet-stream'
+        if os.path.exists(blob_path + '.type'):
+            with open(blob_path + '.type', 'r') as f:
+                mime_type = f.read().strip() or mime_type
+        stat = os.stat(blob_path)
+        return mime_type, stat.st_size, stat.st_mtime, open(blob_path, 'rb')
+    return None
+
+def mark_orphaned_blob(blob_id):
+    """Flag a blob that a drop no longer points at; sweep_orphaned_blobs deletes it if it stays unreferenced"""
+    if init_mongodb():
+        research_db[f'{AUDIO_BUCKET_NAME}.files'].update_many(
+            {'filename': blob_id}, {'$set': {'metadata.orphanedAt': datetime.datetime.utcnow()}}
+        )
+    blob_path = os.path.join(AUDIO_BLOB_DIR, blob_id)
+    with blob_dir_lock():
+        if os.path.exists(blob_path):
+            open(blob_path + '.orphaned', 'w').close()  # Its mtime is the time of the mark
+
+def fallback_store_in_use():
+    """Whether the fallback engine holds any data at all (directory listings and stats only)"""
+    if FALLBACK_ENGINE == 'sqlite':
+        return os.path.exists(SQLITE_PATH)
+    return bool(list_shards() or list_shards(FALLBACK_ARCHIVE_DIR) or
+                os.path.exists(STORAGE_FILE) or os.path.exists(LEGACY_JOURNAL_FILE))
+
+def fallback_blob_references():
+    """Blob ids that fallback drops point at, including day shards still waiting to be archived"""
+    drops = fallback_load_drops()
+    if FALLBACK_ENGINE == 'file':
+        for day in list_shards(FALLBACK_ARCHIVE_DIR):
+            drops.extend(read_archived_shard(day))
+    return {drop.get(key) for drop in drops for key in ('audioBlobId', 'originalBlobId')} - {None}
+
+def sweep_orphaned_blobs():
+    """Delete blobs marked orphaned over BLOB_ORPHAN_GRACE_SECONDS ago that still no drop points at
+
+    Every reference is gathered before anything is deleted, and a blob is only deleted while its mark
+    is still in place, so one reused in the meantime (which clears the mark) survives.
+    """
+    mongo_available = init_mongodb()
+    if USE_MONGODB_PRIMARY and not mongo_available:
+        return 0  # MongoDB drops may point at any blob, so none is provably unreferenced
+    cutoff = time.time() - BLOB_ORPHAN_GRACE_SECONDS
+    files = research_db[f'{AUDIO_BUCKET_NAME}.files'] if mongo_available else None
+    cutoff_date = datetime.datetime.utcfromtimestamp(cutoff)
+    gridfs_candidates = list(files.find(
+        {'metadata.orphanedAt': {'$lte': cutoff_date}}, {'filename': 1}
+    )) if mongo_available else []
+    file_candidates = [
+        name[:-len('.orphaned')] for name in (os.listdir(AUDIO_BLOB_DIR) if os.path.isdir(AUDIO_BLOB_DIR) else [])
+        if name.endswith('.orphaned') and os.stat(os.path.join(AUDIO_BLOB_DIR, name)).st_mtime <= cutoff
+    ]
+    if not gridfs_candidates and not file_candidates:
+        return 0
+    
+    referenced = fallback_blob_references() if fallback_store_in_use() else set()
+    def is_referenced(blob_id):
+        if blob_id in referenced:
+            return True
+        if not mongo_available:
+            return False
+        references = {'$or': [{'audioBlobId': blob_id}, {'originalBlobId': blob_id}]}
+        return any(collection.find_one(references, {'_id': 1}) is not None
+                   for collection in (research_db.active_sounds, research_db.sound_drops_archive))
+    
+    deleted = 0
+    for grid_file in gridfs_candidates:
+        if is_referenced(grid_file['filename']):
+            files.update_one({'_id': grid_file['_id']}, {'$unset': {'metadata.orphanedAt': ''}})
+            continue
+        # Conditional on the mark, which a concurrent reuse of the blob removes
+        if files.delete_one({'_id': grid_file['_id'], 'metadata.orphanedAt': {'$lte': cutoff_date}}).deleted_count:
+            research_db[f'{AUDIO_BUCKET_NAME}.chunks'].delete_many({'files_id': grid_file['_id']})
+            deleted += 1
+    for blob_id in file_candidates:
+        blob_path = os.path.join(AUDIO_BLOB_DIR, blob_id)
+        keep = is_referenced(blob_id)
+        with blob_dir_lock():
+            try:
+                marked_at = os.stat(blob_path + '.orphaned').st_mtime
+            except FileNotFoundError:
+                continue  # Reused since the listing
+            if marked_at > cutoff:
+                continue  # Marked again since the listing
+            for suffix in ('.orphaned',) if keep else ('', '.type', '.orphaned'):
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(blob_path + suffix)
+        if not keep:
+            deleted += 1
+    if deleted:
+        print(f"Blobs: Deleted {deleted} orphaned audio blobs")
+    return deleted
+
+def pcm_to_mono(raw, sample_width, channels):
+    """Decode interleaved little-endian PCM frames into a mono float32 array in [-1, 1]"""
+    # Files cut off mid-frame end in a partial frame, which is dropped
+    frame_bytes = sample_width * channels
+    raw = raw[:len(raw) // frame_bytes * frame_bytes]
+    if sample_width == 1:
+        samples = np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128
+    elif sample_width == 3:
+        # Widen each 24-bit triple to int32, sign-extending through the top byte
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        samples = (((triples[:, 0] | (triples[:, 1] << 8) | (triples[:, 2] << 16)) << 8) >> 8).astype(np.float32)
+    else:
+        samples = np.frombuffer(raw, dtype='<i2' if sample_width == 2 else '<i4').astype(np.float32)
+    mono = samples.reshape(-1, channels).mean(axis=1)
+    return mono / float(1 << (8 * sample_width - 1))
+
+def lowpass_kernel(cutoff, taps=RESAMPLE_FILTER_TAPS):
+    """Blackman-windowed sinc low-pass filter; cutoff is a fraction of the Nyquist frequency"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = cutoff * np.sinc(cutoff * n) * np.blackman(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+def resample_blocks(blocks, source_rate, target_rate):
+    """Downsample a stream of float32 sample blocks: anti-alias, then interpolate linearly"""
+    if target_rate >= source_rate:
+        yield from blocks
+        return
+    kernel = lowpass_kernel(target_rate / source_rate)
+    half = len(kernel) // 2
+    history = np.zeros(len(kernel) - 1, dtype=np.float32)
+    lag = half  # The filter output trails its input by half the kernel
+    previous = None  # Last filtered sample of the previous block, so interpolation spans block edges
+    position = 0  # Source index of the next filtered sample
+    next_output = 0
+    # Trailing zeros flush the last half kernel of samples out of the filter
+    for block in itertools.chain(blocks, [np.zeros(half, dtype=np.float32)]):
+        extended = np.concatenate([history, block])
+        history = extended[len(extended) - len(history):]
+        filtered = np.convolve(extended, kernel, mode='valid')
+        skipped = min(lag, len(filtered))
+        filtered = filtered[skipped:]
+        lag -= skipped
+        if not len(filtered):
+            continue
+        
+        start = position if previous is None else position - 1
+        if previous is not None:
+            filtered = np.concatenate([[previous], filtered])
+        end = start + len(filtered) - 1
+        position = end + 1
+        previous = filtered[-1]
+        # Output sample k sits at source position k * source_rate / target_rate
+        last_output = end * target_rate // source_rate
+        if last_output >= next_output:
+            times = np.arange(next_output, last_output + 1) * (source_rate / target_rate)
+            yield np.interp(times, np.arange(start, end + 1), filtered).astype(np.float32)
+            next_output = last_output + 1
+
+def encode_with_ffmpeg(wav_file):
+    """Encode a WAV file to TRANSCODE_CODEC with the local ffmpeg; returns (mime_type, file) or None"""
+    ffmpeg = shutil.which('ffmpeg')
+    if TRANSCODE_CODEC not in TRANSCODE_CODECS or ffmpeg is None:
+        return None
+    codec_args, mime_type = TRANSCODE_CODECS[TRANSCODE_CODEC]
+    encoded = tempfile.TemporaryFile()
+    wav_file.seek(0)
+    try:
+        subprocess.run(
+            [ffmpeg, '-hide_banner', '-loglevel', 'error', '-f', 'wav', '-i', 'pipe:0', *codec_args, 'pipe:1'],
+            stdin=wav_file, stdout=encoded, check=True, timeout=TRANSCODE_TIMEOUT_SECONDS
+        )
+    except (subprocess.SubprocessError, OSError) as e:
+        print(f"Transcode: ffmpeg {TRANSCODE_CODEC} encoding failed, keeping WAV: {e}")
+        encoded.close()
+        return None
+    encoded.seek(0)
+    return mime_type, encoded
+
+def transcode_audio(stream):
+    """Downmix and resample PCM WAV read from a seekable stream to mono 16-bit at TRANSCODE_SAMPLE_RATE
+
+    Returns (temporary WAV file, sample_rate), or None when the stream is not PCM WAV or already is
+    a mono 16-bit voice recording; the stream is left at its starting position either way.
+    """
+    if TRANSCODE_SAMPLE_RATE <= 0:
+        return None
+    start = stream.tell()
+    try:
+        with wave.open(stream, 'rb') as source:
+            channels, sample_width, rate = source.getnchannels(), source.getsampwidth(), source.getframerate()
+            target_rate = min(rate, TRANSCODE_SAMPLE_RATE)
+            if sample_width not in (1, 2, 3, 4) or (channels == 1 and sample_width == 2 and target_rate == rate):
+                return None
+            
+            def mono_blocks():
+                while True:
+                    raw = source.readframes(TRANSCODE_BLOCK_FRAMES)
+                    if not raw:
+                        return
+                    yield pcm_to_mono(raw, sample_width, channels)
+            
+            output = write_wav(resample_blocks(mono_blocks(), rate, target_rate), target_rate)
+    except (wave.Error, EOFError):
+        return None  # Not a PCM WAV file (compressed formats are stored as they are)
+    finally:
+        stream.seek(start)
+    return output, target_rate
+
+def write_wav(blocks, sample_rate):
+    """Write float32 sample blocks to a temporary mono 16-bit WAV file, rewound for reading"""
+    output = tempfile.TemporaryFile()
+    with wave.open(output, 'wb') as target:
+        target.setnchannels(1)
+        target.setsampwidth(2)
+        target.setframerate(sample_rate)
+        for block in blocks:
+            target.writeframes((np.clip(block, -1, 1) * 32767).round().astype('<i2').tobytes())
+    output.seek(0)
+    return output
+
+def frame_blocks(blocks, frame):
+    """Regroup sample blocks into 2-D arrays of whole frames; the final partial frame comes last on its own"""
+    carry = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        samples = np.concatenate([carry, block])
+        usable = len(samples) // frame * frame
+        if usable:
+            yield samples[:usable].reshape(-1, frame)
+        carry = samples[usable:]
+    if len(carry):
+        yield carry.reshape(1, -1)
+
+def voice_activity(audio_file):
+    """Energy / zero-crossing voice activity of decodable audio, or None; the file is rewound afterwards
+
+    Frames are speech when their energy clears the recording's noise floor by VAD_ENERGY_MARGIN_DB, or by
+    half that for noisy (high zero-crossing) frames such as fricatives. Returns the per-frame speech
+    mask and the frames to keep when trimming silence; with less than VAD_MIN_CONTRAST_DB between loud
+    frames and the floor, the speech mask is None and every frame is kept.
+    """
+    start = audio_file.tell()
+    with decoded_audio(audio_file) as (sample_rate, blocks):
+        if sample_rate is None:
+            audio_file.seek(start)
+            return None
+        frame = max(1, int(sample_rate * VAD_FRAME_SECONDS))
+        energies, crossings = [], []
+        frames = 0
+        for frames_block in frame_blocks(blocks, frame):
+            frames += frames_block.size
+            energies.append((frames_block ** 2).mean(axis=1))
+            signs = np.signbit(frames_block)
+            crossings.append((signs[:, 1:] != signs[:, :-1]).mean(axis=1) if frames_block.shape[1] > 1
+                             else np.zeros(len(frames_block)))
+    audio_file.seek(start)
+    if not energies:
+        return None
+    
+    level = 10 * np.log10(np.concatenate(energies) + 1e-10)
+    zero_crossing_rate = np.concatenate(crossings)
+    floor = np.percentile(level, 10)
+    keep = np.ones(len(level), dtype=bool)
+    activity = {'sample_rate': sample_rate, 'frame': frame, 'frames': frames, 'speech': None, 'keep': keep}
+    if np.percentile(level, 90) - floor < VAD_MIN_CONTRAST_DB:
+        return activity
+    speech = (level > VAD_MIN_SPEECH_DB) & (
+        (level > floor + VAD_ENERGY_MARGIN_DB)
+        | ((level > floor + VAD_ENERGY_MARGIN_DB / 2) & (zero_crossing_rate > VAD_FRICATIVE_ZCR))
+    )
+    
+    # Keep some audio either side of speech so word onsets and endings are not clipped
+    padding = int(VAD_PADDING_SECONDS / VAD_FRAME_SECONDS)
+    voiced = np.convolve(speech, np.ones(2 * padding + 1), mode='same') > 0
+    if voiced.any():
+        first, last = voiced.argmax(), len(voiced) - voiced[::-1].argmax()
+        keep[:first] = False
+        keep[last:] = False
+        max_pause = int(MAX_PAUSE_SECONDS / VAD_FRAME_SECONDS)
+        if max_pause > 0:
+            # Shorten every pause to its first max_pause frames
+            silent = ~voiced[first:last]
+            index = np.arange(len(silent))
+            pause_start = np.maximum.accumulate(np.where(silent, 0, index + 1))
+            keep[first:last] &= ~silent | (index - pause_start < max_pause)
+    activity['speech'] = speech
+    return activity
+
+def trim_silence(audio_file, activity):
+    """Write only the frames voice_activity kept to a temporary WAV file; the file is rewound afterwards"""
+    start = audio_file.tell()
+    keep, frame = activity['keep'], activity['frame']
+    def kept_blocks(blocks):
+        first_frame = 0
+        for frames_block in frame_blocks(blocks, frame):
+            yield frames_block[keep[first_frame:first_frame + len(frames_block)]].reshape(-1)
+            first_frame += len(frames_block)
+    with decoded_audio(audio_file) as (sample_rate, blocks):
+        output = write_wav(kept_blocks(blocks), sample_rate)
+    audio_file.seek(start)
+    return output
+
+def journal_recording(drop):
+    """Whether SOUNDDROP_TRIM_SILENCE applies to a drop: only voice-journal recorder takes are trimmed"""
+    return TRIM_SILENCE and drop.get('source') == 'journal' and drop.get('type') == 'recorded'
+
+def process_audio(stream, trim=False):
+    """Ingest stages for audio read from a seekable stream
+
+    PCM WAV is transcoded; anything decodable is fingerprinted and analysed for voice activity and,
+    with trim (see journal_recording), trimmed; the result is encoded to TRANSCODE_CODEC when set.
+    Returns (metadata fields, (mime_type, temporary file) to store instead of the stream, or None).
+    """
+    fields = {}
+    transcoded = transcode_audio(stream)
+    output, sample_rate = transcoded if transcoded is not None else (None, None)
+    # Fingerprints are taken before trimming, so they stay comparable with untrimmed archive audio
+    fields.update(fingerprint_fields(audio_fingerprint(output or stream)))
+    activity = voice_activity(output or stream)
+    if activity is not None:
+        seconds_per_frame = activity['frame'] / activity['sample_rate']
+        fields['audioDuration'] = round(activity['frames'] / activity['sample_rate'], 3)
+        if activity['speech'] is not None:
+            fields['speechRatio'] = round(float(activity['speech'].mean()), 4)
+        fields['trimmedDuration'] = round(float(activity['keep'].sum() * seconds_per_frame), 3)
+        if trim and not activity['keep'].all():
+            trimmed = trim_silence(output or stream, activity)
+            if output is not None:
+                output.close()
+            output, sample_rate = trimmed, activity['sample_rate']
+            fields['silenceTrimmed'] = True
+    if output is None:
+        return fields, None
+    
+    fields['audioSampleRate'] = sample_rate
+    mime_type = 'audio/wav'
+    if TRANSCODE_CODEC:
+        encoded = encode_with_ffmpeg(output)
+        if encoded is not None:
+            output.close()
+            mime_type, output = encoded
+    return fields, (mime_type, output)
+
+def stream_digest(stream):
+    """SHA-256 of a seekable stream's remaining bytes, leaving its position unchanged"""
+    start = stream.tell()
+    digest = hashlib.sha256()
+    for chunk in read_chunks(stream):
+        digest.update(chunk)
+    stream.seek(start)
+    return digest.hexdigest()
+
+def store_processed_audio(stream, mime_type, keep_original=False, trim=False):
+    """Run the ingest stages and store the result; returns the audio fields of the drop
+
+    The processed audio is only stored when it is smaller than the upload; otherwise the upload is
+    stored as it is, with the analysis metadata of the processed version dropped.
+    """
+    start = stream.tell()
+    original_size = stream.seek(0, os.SEEK_END) - start
+    stream.seek(start)
+    try:
+        fields, processed = process_audio(stream, trim)
+    except Exception as e:
+        # Audio the ingest stages cannot handle is still a valid upload
+        print(f"Ingest: Processing failed, storing the upload unchanged: {e}")
+        fields, processed = {}, None
+        stream.seek(start)
+    if processed is not None and processed[1].seek(0, os.SEEK_END) >= original_size:
+        processed[1].close()
+        processed = None
+    if processed is None:
+        for key in ('audioSampleRate', 'silenceTrimmed'):
+            fields.pop(key, None)
+        blob_id, size = store_audio_stream(stream, mime_type)
+        return {**fields, 'audioBlobId': blob_id, 'audioMimeType': mime_type, 'audioSize': size}
+    
+    processed_mime_type, output = processed
+    if fields.get('silenceTrimmed'):
+        fields['audioDuration'] = fields['trimmedDuration']
+    output.seek(0)
+    with output:
+        blob_id, size = store_audio_stream(output, processed_mime_type)
+    fields.update({
+        'audioBlobId': blob_id,
+        'audioMimeType': processed_mime_type,
+        'audioSize': size,
+        'originalMimeType': mime_type,
+        'originalSize': original_size
+    })
+    if keep_original:
+        fields['originalBlobId'] = store_audio_stream(stream, mime_type)[0]
+    print(f"Transcode: Stored {original_size} bytes of {mime_type} as {size} bytes of {processed_mime_type}")
+    return fields
+
+def ingest_audio(stream, mime_type, content_hash=None, trim=False):
+    """Store an upload read from a seekable stream; returns the audio fields of its drop
+
+    contentHash is always the digest of the uploaded bytes (content_hash, when the caller has
+    already computed it), so re-uploads are recognised even when the stored audio is a transcode.
+    Silence is only trimmed with trim, i.e. for journal_recording drops.
+    """
+    if TRANSCODE_IN_BACKGROUND:
+        blob_id, size = store_audio_stream(stream, mime_type)
+        return {'audioBlobId': blob_id, 'audioMimeType': mime_type, 'audioSize': size, 'contentHash': blob_id}
+    content_hash = content_hash or stream_digest(stream)
+    return {**store_processed_audio(stream, mime_type, KEEP_ORIGINAL_AUDIO, trim), 'contentHash': content_hash}
+
+def transcode_drop_audio(drop_id, blob_id, mime_type, trim=False):
+    """Background job: run the ingest stages over a drop's stored upload and swap in the result"""
+    try:
+        blob = open_audio_blob(blob_id)
+        if blob is None:
+            return
+        with blob[3] as audio_file:
+            fields = store_processed_audio(audio_file, mime_type, trim=trim)
+        if NEAR_DUPLICATES != 'off' and fields.get('fingerprint'):
+            # Too late to reject the drop, so near-duplicates are only flagged
+            match, distance = find_near_duplicate(fields['fingerprint'], fields['fingerprintBands'], exclude_id=drop_id)
+            if match is not None:
+                fields.update({'nearDuplicateOf': match['id'], 'nearDuplicateDistance': distance})
+        replaced = fields['audioBlobId'] != blob_id
+        if replaced and KEEP_ORIGINAL_AUDIO:
+            fields['originalBlobId'] = blob_id
+        if update_drop_fields(drop_id, fields) and replaced and not KEEP_ORIGINAL_AUDIO:
+            mark_orphaned_blob(blob_id)
     except Exception as e:
-        print(f"Failed to archive to research database: {e} (continuing without archiving)")
-        return True  # Don't fail the whole operation
+        print(f"Transcode: Background transcoding of drop {drop_id} failed: {e}")
+
+def schedule_transcode(drop):
+    """Queue a new drop's audio for the ingest stages off the request thread"""
+    global transcode_executor
+    if not TRANSCODE_IN_BACKGROUND or not drop.get('audioBlobId'):
+        return
+    if transcode_executor is None:
+        transcode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sounddrop-transcode')
+    transcode_executor.submit(
+        transcode_drop_audio, drop['id'], drop['audioBlobId'], drop['audioMimeType'], journal_recording(drop)
+    )
+
+@contextlib.contextmanager
+def decoded_audio(audio_file):
+    """Decode audio to mono float32 blocks; yields (sample_rate, blocks), or (None, None) if it cannot be decoded"""
+    start = audio_file.tell()
+    try:
+        source = wave.open(audio_file, 'rb')
+    except (wave.Error, EOFError):
+        source = None
+    if source is not None:
+        with source:
+            channels, sample_width = source.getnchannels(), source.getsampwidth()
+            if sample_width not in (1, 2, 3, 4):
+                yield None, None
+                return
+            def blocks():
+                while True:
+                    raw = source.readframes(TRANSCODE_BLOCK_FRAMES)
+                    if not raw:
+                        return
+                    yield pcm_to_mono(raw, sample_width, channels)
+            yield source.getframerate(), blocks()
+        return
+    
+    # Anything else (browser recordings are usually WebM/Opus) needs the local ffmpeg
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        yield None, None
+        return
+    audio_file.seek(start)
+    with tempfile.TemporaryFile() as spool:
+        shutil.copyfileobj(audio_file, spool, AUDIO_CHUNK_BYTES)
+        spool.seek(0)
+        process = subprocess.Popen(
+            [ffmpeg, '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+             '-ac', '1', '-ar', str(DECODE_SAMPLE_RATE), '-f', 's16le', 'pipe:1'],
+            stdin=spool, stdout=subprocess.PIPE
+        )
+        try:
+            def blocks():
+                while True:
+                    raw = process.stdout.read(TRANSCODE_BLOCK_FRAMES * 2)
+                    if not raw:
+                        return
+                    yield pcm_to_mono(raw[:len(raw) // 2 * 2], 2, 1)
+            yield DECODE_SAMPLE_RATE, blocks()
+        finally:
+            process.kill()
+            process.wait()
+
+def fingerprint_band_matrix(sample_rate):
+    """(rfft bins x FINGERPRINT_BANDS) 0/1 matrix summing power into log-spaced bands"""
+    frequencies = np.fft.rfftfreq(FINGERPRINT_FRAME, 1 / sample_rate)
+    edges = np.geomspace(FINGERPRINT_LOW_HZ, min(FINGERPRINT_HIGH_HZ, sample_rate / 2), FINGERPRINT_BANDS + 1)
+    bands = np.digitize(frequencies, edges) - 1
+    return (bands[:, None] == np.arange(FINGERPRINT_BANDS)[None, :]).astype(np.float32)
+
+def audio_fingerprint(audio_file):
+    """Packed fingerprint bits of decodable audio, or None if it cannot be decoded or is too short"""
+    start = audio_file.tell()
+    with decoded_audio(audio_file) as (sample_rate, blocks):
+        if sample_rate is None:
+            audio_file.seek(start)
+            return None
+        target_rate = min(sample_rate, FINGERPRINT_SAMPLE_RATE)
+        band_matrix = fingerprint_band_matrix(target_rate)
+        window = np.hanning(FINGERPRINT_FRAME).astype(np.float32)
+        energies, hop_powers = [], []
+        # Frames overlap by FINGERPRINT_OVERLAP hops, so band levels do not depend on where framing starts
+        carry = np.zeros((0, FINGERPRINT_HOP), dtype=np.float32)
+        for hops in frame_blocks(resample_blocks(blocks, sample_rate, target_rate), FINGERPRINT_HOP):
+            if hops.shape[1] != FINGERPRINT_HOP:
+                continue
+            hop_powers.append((hops ** 2).sum(axis=1))
+            hops = np.concatenate([carry, hops])
+            count = len(hops) - FINGERPRINT_OVERLAP + 1
+            if count > 0:
+                frames = np.concatenate([hops[i:i + count] for i in range(FINGERPRINT_OVERLAP)], axis=1)
+                energies.append((np.abs(np.fft.rfft(frames * window, axis=1)) ** 2) @ band_matrix)
+            carry = hops[max(0, len(hops) - FINGERPRINT_OVERLAP + 1):]
+    audio_file.seek(start)
+    if not energies:
+        return None
+    
+    level = np.log10(np.concatenate(energies) + 1e-10)
+    level = np.maximum(level, level.max() - FINGERPRINT_FLOOR_DB / 10)
+    # Leading and trailing near-silence does not count, so padded copies still line up; frame k spans
+    # hops k .. k + FINGERPRINT_OVERLAP - 1, and only frames wholly inside the sound are used
+    loudness = 10 * np.log10(np.concatenate(hop_powers) + 1e-10)
+    active = np.flatnonzero(loudness > loudness.max() - 40)
+    level = level[active[0]:active[-1] - FINGERPRINT_OVERLAP + 2]
+    if len(level) < FINGERPRINT_SLICES:
+        return None
+    
+    edges = np.linspace(0, len(level), FINGERPRINT_SLICES + 1).astype(int)
+    pooled = np.add.reduceat(level, edges[:-1], axis=0) / np.diff(edges)[:, None]
+    band_differences = pooled[:, :-1] - pooled[:, 1:]
+    return np.packbits((band_differences[1:] - band_differences[:-1]) > 0)
+
+def fingerprint_fields(fingerprint):
+    """Drop fields for a fingerprint: its hex form and one LSH key per 16-bit row (row << 16 | bits)
+
+    All-zero rows come from silence, which unrelated recordings share, so they are not used as keys.
+    """
+    if fingerprint is None:
+        return {}
+    rows = fingerprint.view('>u2')
+    return {
+        'fingerprint': fingerprint.tobytes().hex(),
+        'fingerprintBands': [(row << 16) | int(bits) for row, bits in enumerate(rows) if bits],
+        'fingerprintVersion': FINGERPRINT_VERSION
+    }
+
+def fingerprint_distances(fingerprint_hex, candidates):
+    """Hamming distance between a fingerprint and each candidate drop's fingerprint"""
+    reference = np.frombuffer(bytes.fromhex(fingerprint_hex), dtype=np.uint8)
+    others = np.array([np.frombuffer(bytes.fromhex(drop['fingerprint']), dtype=np.uint8) for drop in candidates])
+    return np.unpackbits(others ^ reference, axis=1).sum(axis=1)
+
+def find_near_duplicate(fingerprint_hex, bands, exclude_id=None, older_than=None):
+    """(drop, distance) of the closest active or archived drop within FINGERPRINT_MAX_DISTANCE, or (None, None)
+
+    Candidates share at least one LSH band with the fingerprint, so the lookup is an indexed
+    query rather than a scan; the FINGERPRINT_MAX_CANDIDATES sharing the most bands are compared.
+    The fallback store is only scanned when MongoDB is unavailable.
+    """
+    query = {'fingerprintBands': {'$in': bands}, 'fingerprintVersion': FINGERPRINT_VERSION}
+    if older_than is not None:
+        query['id'] = {'$lt': older_than}
+    pipeline = [
+        {'$match': query},
+        {'$project': {'_id': 0, 'audioData': 0}},
+        {'$addFields': {'sharedBands': {'$size': {
+            '$filter': {'input': '$fingerprintBands', 'cond': {'$in': ['$$this', bands]}}
+        }}}},
+        {'$sort': {'sharedBands': -1}},
+        {'$limit': FINGERPRINT_MAX_CANDIDATES},
+        {'$project': {'fingerprintBands': 0, 'sharedBands': 0}}
+    ]
+    candidates = None
+    if init_mongodb():
+        try:
+            candidates = []
+            for collection in (research_db.active_sounds, research_db.sound_drops_archive):
+                candidates.extend(collection.aggregate(pipeline))
+        except Exception as e:
+            print(f"MongoDB fingerprint lookup failed, checking file storage only: {e}")
+            record_mongo_error(e)
+            candidates = None
+    if candidates is None:
+        band_set = set(bands)
+        candidates = [
+            drop for drop in fallback_load_drops()
+            if drop.get('fingerprintVersion') == FINGERPRINT_VERSION
+            and band_set.intersection(drop.get('fingerprintBands') or ())
+            and (older_than is None or drop['id'] < older_than)
+        ]
+    candidates = [drop for drop in candidates if drop.get('fingerprint') and drop.get('id') != exclude_id]
+    if not candidates:
+        return None, None
+    
+    distances = fingerprint_distances(fingerprint_hex, candidates)
+    best = int(distances.argmin())
+    if distances[best] > FINGERPRINT_MAX_DISTANCE:
+        return None, None
+    return candidates[best], int(distances[best])
+
+def mel_filterbank(sample_rate):
+    """(rfft bins x FEATURE_MEL_BANDS) triangular filters evenly spaced on the mel scale"""
+    top_mel = 2595 * np.log10(1 + sample_rate / 2 / 700)
+    edges = 700 * (10 ** (np.linspace(0, top_mel, FEATURE_MEL_BANDS + 2) / 2595) - 1)
+    lower, center, upper = edges[:-2], edges[1:-1], edges[2:]
+    frequencies = np.fft.rfftfreq(FEATURE_FRAME, 1 / sample_rate)[:, None]
+    return np.maximum(0, np.minimum((frequencies - lower) / (center - lower),
+                                    (upper - frequencies) / (upper - center))).astype(np.float32)
+
+def dct_matrix():
+    """(FEATURE_MEL_BANDS x FEATURE_MFCC_COUNT) orthonormal DCT-II turning log mel energies into cepstra"""
+    bands = np.arange(FEATURE_MEL_BANDS)[:, None]
+    coefficients = np.arange(FEATURE_MFCC_COUNT)[None, :]
+    matrix = np.cos(np.pi * coefficients * (2 * bands + 1) / (2 * FEATURE_MEL_BANDS)) * np.sqrt(2 / FEATURE_MEL_BANDS)
+    matrix[:, 0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+def extract_audio_features(audio_file):
+    """Acoustic features of a seekable encoded audio file, or None if it cannot be decoded"""
+    with decoded_audio(audio_file) as (sample_rate, blocks):
+        if sample_rate is None:
+            return None
+        target_rate = min(sample_rate, FEATURE_SAMPLE_RATE)
+        frequencies = np.fft.rfftfreq(FEATURE_FRAME, 1 / target_rate)
+        filterbank, dct = mel_filterbank(target_rate), dct_matrix()
+        window = np.hanning(FEATURE_FRAME).astype(np.float32)
+        samples, frames, energy, peak = 0, 0, 0.0, 0.0
+        spectral_power, weighted_frequency = 0.0, 0.0
+        mel_sum = np.zeros(FEATURE_MEL_BANDS)
+        mfcc_sum = np.zeros(FEATURE_MFCC_COUNT)
+        for block in frame_blocks(resample_blocks(blocks, sample_rate, target_rate), FEATURE_FRAME):
+            samples += block.size
+            energy += float((block.astype(np.float64) ** 2).sum())
+            peak = max(peak, float(np.abs(block).max()))
+            if block.shape[1] != FEATURE_FRAME:
+                continue
+            power = np.abs(np.fft.rfft(block * window, axis=1)) ** 2
+            spectral_power += float(power.sum())
+            weighted_frequency += float((power @ frequencies).sum())
+            log_mel = np.log(power @ filterbank + 1e-10)
+            mel_sum += log_mel.sum(axis=0)
+            mfcc_sum += (log_mel @ dct).sum(axis=0)
+            frames += len(block)
+    if not samples:
+        return None
+    
+    return {
+        'duration': round(samples / target_rate, 3),
+        'rms_db': round(float(10 * np.log10(energy / samples + 1e-10)), 2),
+        'peak_db': round(float(20 * np.log10(peak + 1e-10)), 2),
+        # Energy-weighted over all frames, so silence does not drag it down
+        'spectral_centroid_hz': round(weighted_frequency / spectral_power, 1) if spectral_power else None,
+        'mel_bands': (mel_sum / frames).round(4).tolist() if frames else None,
+        'mfcc': (mfcc_sum / frames).round(4).tolist() if frames else None
+    }
+
+def init_feature_worker():
+    """ProcessPoolExecutor initializer: a forked MongoClient is not safe to use, so connect afresh
+
+    The parent already ran ensure_indexes and ensure_stats, so workers only open a client;
+    with research_db set, init_mongodb skips schema setup in the worker.
+    """
+    global mongo_client, research_db
+    mongo_client = MongoClient(MONGODB_URI, serverSelectionTimeoutMS=5000)
+    research_db = mongo_client[MONGODB_DATABASE]
+
+def extract_drop_features(doc):
+    """Worker job: features of an archived drop, whose audio the worker opens itself
+
+    doc only carries _id and audioBlobId; inline audio of legacy records is read from the archive here.
+    """
+    if not doc.get('audioBlobId') and init_mongodb():
+        doc = research_db.sound_drops_archive.find_one({'_id': doc['_id']}, {'audioData': 1}) or {}
+    opened = open_drop_audio(doc)
+    if opened is None:
+        return None
+    with opened[1] as audio_file:
+        return extract_audio_features(audio_file)
+
+def reduce_waveform(peak, rms, buckets):
+    """Downsample window levels to at most `buckets` (loudest peak and pooled RMS of each span)"""
+    if len(peak) <= buckets:
+        return peak, rms
+    edges = np.linspace(0, len(peak), buckets + 1).astype(int)
+    energy = np.add.reduceat(rms.astype(np.float32) ** 2, edges[:-1]) / np.diff(edges)
+    return np.maximum.reduceat(peak, edges[:-1]), np.sqrt(energy)
+
+def compute_waveform(sample_rate, blocks):
+    """Waveform summary of decoded audio: {'duration', 'peak', 'rms'} with float16 level arrays"""
+    window = max(1, int(sample_rate * WAVEFORM_WINDOW_SECONDS))
+    peaks, energies = [], []
+    carry = np.zeros(0, dtype=np.float32)
+    frames = 0
+    for block in blocks:
+        frames += len(block)
+        samples = np.concatenate([carry, block])
+        usable = len(samples) // window * window
+        windows = samples[:usable].reshape(-1, window)
+        peaks.append(np.abs(windows).max(axis=1, initial=0))
+        energies.append((windows ** 2).mean(axis=1))
+        carry = samples[usable:]
+    if len(carry):
+        peaks.append(np.abs(carry).max(keepdims=True))
+        energies.append((carry ** 2).mean(keepdims=True))
+    
+    peak = np.concatenate(peaks) if peaks else np.zeros(0, dtype=np.float32)
+    rms = np.sqrt(np.concatenate(energies)) if energies else np.zeros(0, dtype=np.float32)
+    peak, rms = reduce_waveform(peak, rms, WAVEFORM_LEVEL_BUCKETS)
+    return {'duration': frames / sample_rate, 'peak': peak.astype(np.float16), 'rms': rms.astype(np.float16)}
+
+def load_waveform(digest):
+    if init_mongodb():
+        try:
+            doc = research_db.waveforms.find_one({'_id': digest})
+            if doc is not None:
+                return {
+                    'duration': doc['duration'],
+                    'peak': np.frombuffer(doc['peak'], dtype=np.float16),
+                    'rms': np.frombuffer(doc['rms'], dtype=np.float16)
+                }
+        except Exception as e:
+            print(f"MongoDB waveform load failed, trying file storage: {e}")
+            record_mongo_error(e)
     
-    return True
+    path = os.path.join(WAVEFORM_DIR, digest + '.npz')
+    if os.path.exists(path):
+        with np.load(path) as stored:
+            return {'duration': float(stored['duration']), 'peak': stored['peak'], 'rms': stored['rms']}
+    return None
+
+def save_waveform(digest, waveform):
+    if init_mongodb():
+        try:
+            research_db.waveforms.replace_one({'_id': digest}, {
+                'duration': waveform['duration'],
+                'peak': waveform['peak'].tobytes(),
+                'rms': waveform['rms'].tobytes(),
+                'createdAt': datetime.datetime.utcnow()
+            }, upsert=True)
+            return
+        except Exception as e:
+            print(f"MongoDB waveform save failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    os.makedirs(WAVEFORM_DIR, exist_ok=True)
+    path = os.path.join(WAVEFORM_DIR, digest + '.npz')
+    with open(path + '.tmp', 'wb') as f:
+        np.savez(f, duration=waveform['duration'], peak=waveform['peak'], rms=waveform['rms'])
+    os.replace(path + '.tmp', path)
+
+def open_drop_audio(drop):
+    """(digest, file) for a drop's stored or inline audio; None for link drops and missing blobs"""
+    if drop.get('audioBlobId'):
+        blob = open_audio_blob(drop['audioBlobId'])
+        return None if blob is None else (drop['audioBlobId'], blob[3])
+    parsed = parse_audio_data_url(drop.get('audioData'))
+    if parsed is None:
+        return None
+    return hashlib.sha256(parsed[1]).hexdigest(), io.BytesIO(parsed[1])
+
+def drop_waveform(drop):
+    """(digest, waveform) of a drop's audio, computed on first use and cached per digest; None if undecodable"""
+    if drop.get('audioBlobId'):
+        # A stored blob's id is its digest, so a cache hit needs no GridFS query
+        waveform = load_waveform(drop['audioBlobId'])
+        if waveform is not None:
+            return drop['audioBlobId'], waveform
+    opened = open_drop_audio(drop)
+    if opened is None:
+        return None
+    digest, audio_file = opened
+    with audio_file:
+        waveform = None if drop.get('audioBlobId') else load_waveform(digest)
+        if waveform is not None:
+            return digest, waveform
+        try:
+            with decoded_audio(audio_file) as (sample_rate, blocks):
+                if sample_rate is None:
+                    return None
+                waveform = compute_waveform(sample_rate, blocks)
+        except (wave.Error, EOFError, ValueError) as e:
+            print(f"Waveform: Could not decode {digest[:12]}: {e}")
+            return None
+    save_waveform(digest, waveform)
+    print(f"Waveform: Computed {len(waveform['peak'])} levels for {digest[:12]}")
+    return digest, waveform
+
+def externalize_audio(drop):
+    """Move inline data-URL audio into the blob store, leaving only a reference on the drop"""
+    parsed = parse_audio_data_url(drop.get('audioData'))
+    if parsed is None:
+        # Links are kept as-is and hashed by their text
+        if isinstance(drop.get('audioData'), str):
+            drop['contentHash'] = hashlib.sha256(drop['audioData'].encode('utf-8')).hexdigest()
+        return drop
+    mime_type, audio_bytes = parsed
+    drop['audioBlobId'] = store_audio_blob(audio_bytes, mime_type)
+    drop['audioMimeType'] = mime_type
+    drop['audioSize'] = len(audio_bytes)
+    # The blob id is the SHA-256 of the decoded audio, so it doubles as the content hash
+    drop['contentHash'] = drop['audioBlobId']
+    del drop['audioData']
+    return drop
+
+def audio_url(blob_id):
+    return f'/api/audio/{blob_id}'
+
+def public_drop(drop):
+    """Metadata-only view of a drop for API responses (audio is fetched separately)"""
+    if 'fingerprint' in drop:
+        drop = {key: value for key, value in drop.items()
+                if key not in ('fingerprint', 'fingerprintBands', 'fingerprintVersion')}
+    if not drop.get('audioBlobId'):
+        return drop
+    public = dict(drop)
+    public['audioUrl'] = audio_url(drop['audioBlobId'])
+    # Existing clients play whatever is in audioData, and a URL works as well as a data URL
+    public['audioData'] = public['audioUrl']
+    return public
 
 def load_sound_drops():
     """Load sound drops - uses MongoDB on Vercel, file storage as fallback"""
@@ -90,117 +1589,1205 @@ def load_sound_drops():
         if USE_MONGODB_PRIMARY and init_mongodb():
             try:
                 collection = research_db.active_sounds
-                
-                # Get all active sounds (not archived)
-                cursor = collection.find({'archived': {'$ne': True}})
-                data = list(cursor)
-                
-                # Convert MongoDB _id to string id for consistency
-                for drop in data:
-                    if '_id' in drop:
-                        del drop['_id']  # Remove MongoDB _id, keep the 'id' field
-                
-                print(f"MongoDB: Loaded {len(data)} active sounds")
-                
-                # Archive drops older than 7 days to research database
                 now = datetime.datetime.now().timestamp() * 1000
-                seven_days_ms = 7 * 24 * 60 * 60 * 1000  # 7 days in milliseconds
-                expired_drops = [drop for drop in data if (now - drop['timestamp']) >= seven_days_ms]
-                
-                if expired_drops:
-                    print(f"Found {len(expired_drops)} expired drops (>7 days) to archive")
-                    for drop in expired_drops:
-                        # Mark as archived in active collection
-                        collection.update_one(
-                            {'id': drop['id']}, 
-                            {'$set': {'archived': True, 'archived_at': now}}
-                        )
-                        # Also save to research collection
-                        archive_to_research_db(drop)
-                    
-                    # Remove expired drops from returned data
-                    data = [drop for drop in data if (now - drop['timestamp']) < seven_days_ms]
                 
                 # Return sounds from the last 30 hours to account for timezone differences
-                thirty_hours_ms = 30 * 60 * 60 * 1000  # 30 hours in milliseconds
-                valid_drops = [drop for drop in data if (now - drop['timestamp']) < thirty_hours_ms]
+                valid_drops = list(collection.find(feed_query(now), {'_id': 0}).sort('timestamp', -1))
                 print(f"MongoDB: Returning {len(valid_drops)} drops from last 30 hours")
                 return valid_drops
                 
             except Exception as e:
                 print(f"MongoDB load failed, falling back to file storage: {e}")
+                record_mongo_error(e)
         
         # Fallback to file storage
+        now = datetime.datetime.now().timestamp() * 1000
+        
+        # Return sounds from the last 30 hours to account for timezone differences
+        # Frontend will do the precise filtering based on user's local midnight
+        valid_drops = fallback_load_drops(start_ms=now - FEED_WINDOW_MS)
+        valid_drops.sort(key=lambda drop: drop['timestamp'], reverse=True)
+        print(f"File: Returning {len(valid_drops)} drops from last 30 hours (frontend will filter to local midnight)")
+        return valid_drops
+    except Exception as e:
+        print(f"Error loading sound drops: {e}")
+        return []
+
+def committed_change_seq():
+    """(engine, seq): the engine serving the feed ('m' MongoDB, 'f' file shards, 's' SQLite) and the change
+    sequence up to which all its changes have committed; each engine counts on its own, so cursors carry it"""
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            return 'm', mongo_committed_sequence('feed_changes')
+        except Exception as e:
+            print(f"MongoDB change cursor lookup failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    return ('s' if FALLBACK_ENGINE == 'sqlite' else 'f'), fallback_committed_change_seq()
+
+def format_change_cursor(engine, seq):
+    return f'{engine}:{seq}'
+
+def parse_change_cursor(cursor):
+    """(engine, seq) of a cursor such as 'm:5000'; (None, None) for a bare pre-engine integer; None if malformed"""
+    if cursor.isdigit():
+        return None, None
+    engine, separator, seq = cursor.partition(':')
+    if not separator or not seq.isdigit():
+        return None
+    return engine, int(seq)
+
+def load_feed_changes(engine, since):
+    """(drops, tombstones) of the feed changed after since in the given engine's sequence; None if it failed"""
+    now = datetime.datetime.now().timestamp() * 1000
+    if engine != 'm':
+        return fallback_load_changes(since, now - FEED_WINDOW_MS)
+    try:
+        drops = list(research_db.active_sounds.find(
+            {**feed_query(now), 'changeSeq': {'$gt': since}}, {'_id': 0}
+        ).sort('changeSeq', 1))
+        tombstones = list(research_db.tombstones.find(
+            {'changeSeq': {'$gt': since}}, {'_id': 0, 'id': 1, 'changeSeq': 1}
+        ).sort('changeSeq', 1))
+        return drops, tombstones
+    except Exception as e:
+        # The fallback engine's sequence means nothing to this cursor; the client resyncs instead
+        print(f"MongoDB change query failed: {e}")
+        record_mongo_error(e)
+        return None
+
+def invalidate_feed_cache():
+    """Forget every cached feed entry and bump the feed version"""
+    global feed_version
+    with FEED_CACHE_LOCK:
+        feed_version += 1
+        feed_cache.clear()
+
+def invalidates_feed_cache(func):
+    """Decorator for write helpers: invalidate the feed cache once the write has returned"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            invalidate_feed_cache()
+    return wrapper
+
+def cached_feed_entry(key, build):
+    """Value cached under key, calling build() when it is missing or expired (LRU-bounded)"""
+    if FEED_CACHE_TTL_SECONDS <= 0:
+        return build()
+    now = time.monotonic()
+    with FEED_CACHE_LOCK:
+        entry = feed_cache.get(key)
+        if entry is not None and entry['expires_at'] > now:
+            feed_cache.move_to_end(key)
+            return entry['value']
+        version = feed_version
+    
+    value = build()
+    with FEED_CACHE_LOCK:
+        # A write that finished while building may not be reflected in value; don't keep it
+        if version == feed_version:
+            feed_cache[key] = {'value': value, 'expires_at': now + FEED_CACHE_TTL_SECONDS}
+            feed_cache.move_to_end(key)
+            while len(feed_cache) > FEED_CACHE_MAX_ENTRIES:
+                feed_cache.popitem(last=False)
+    return value
+
+def feed_snapshot():
+    """Serialized public feed with its strong ETag and drop count, served from the cache"""
+    def build():
+        # The cursor is read first: every change up to it has committed, so the feed below has it
+        engine, seq = committed_change_seq()
+        drops = load_sound_drops()
+        engine_after = committed_change_seq()[0]
+        if engine_after != engine:
+            # The engine switched while loading, so the feed may come from either; the next delta
+            # then replays every change the new engine holds
+            engine, seq = engine_after, 0
+        body = app.json.dumps([public_drop(drop) for drop in drops]).encode('utf-8')
+        return {
+            'body': body,
+            'etag': hashlib.sha256(body).hexdigest()[:32],
+            'count': len(drops),
+            'cursor': format_change_cursor(engine, seq)
+        }
+    return cached_feed_entry('feed', build)
+
+def feed_resync_snapshot():
+    """Delta response that replaces the client's view with the full feed (reset: true)"""
+    feed = feed_snapshot()
+    # The feed body is already a serialized list of drops, so it is embedded as it is
+    body = b'{"reset": true, "cursor": %s, "deleted": [], "drops": %s}' % (
+        app.json.dumps(feed['cursor']).encode('utf-8'), feed['body']
+    )
+    return {'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32], 'cursor': feed['cursor']}
+
+def feed_changes_snapshot(engine, since):
+    """Serialized delta of the feed after since in engine's change sequence, served from the cache
+
+    A cursor from another engine (the breaker switched between MongoDB and the fallback), an unknown
+    one, or one ahead of the engine's counter (a wiped fallback store) cannot be compared with the
+    current sequence, so the client gets the full feed with reset: true instead.
+    """
+    def build():
+        current_engine, committed = committed_change_seq()
+        if engine != current_engine or since > committed:
+            return feed_resync_snapshot()
+        changes = load_feed_changes(engine, since)
+        if changes is None:
+            return feed_resync_snapshot()
+        drops, tombstones = changes
+        # Changes above the cursor may be in this delta too; they are sent again with the next one
+        cursor = format_change_cursor(engine, committed)
+        body = app.json.dumps({
+            'reset': False,
+            'cursor': cursor,
+            'drops': [public_drop(drop) for drop in drops],
+            'deleted': [tombstone['id'] for tombstone in tombstones]
+        }).encode('utf-8')
+        return {'body': body, 'etag': hashlib.sha256(body).hexdigest()[:32], 'cursor': cursor}
+    return cached_feed_entry(('changes', engine, since), build)
+
+def shard_for_timestamp(timestamp_ms):
+    """Day shard (UTC date) that holds drops with this timestamp"""
+    return datetime.datetime.utcfromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%d')
+
+def shard_bounds(day):
+    """[start, end) of a day shard in milliseconds"""
+    start = datetime.datetime.strptime(day, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
+    start_ms = start.timestamp() * 1000
+    return start_ms, start_ms + 24 * 60 * 60 * 1000
+
+def shard_path(day, name, base_dir=None):
+    return os.path.join(base_dir or FALLBACK_DIR, day, name)
+
+def list_shards(base_dir=None):
+    """Day shards on disk, oldest first (directory listing only, no file contents read)"""
+    base_dir = base_dir or FALLBACK_DIR
+    if not os.path.isdir(base_dir):
+        return []
+    return sorted(name for name in os.listdir(base_dir) if SHARD_NAME_PATTERN.match(name))
+
+def read_shard_snapshot(day):
+    """Read a shard snapshot as (generation, drops)"""
+    snapshot_file = shard_path(day, 'snapshot.json')
+    if not os.path.exists(snapshot_file):
+        return 0, []
+    with open(snapshot_file, 'r') as f:
+        snapshot = json.load(f)
+    return snapshot['generation'], snapshot['drops']
+
+@contextlib.contextmanager
+def shard_lock(day):
+    """Exclusive lock over one day shard, shared by threads and gunicorn workers"""
+    with STORAGE_LOCK:
+        day_lock = SHARD_LOCKS.setdefault(day, threading.Lock())
+    with day_lock:
+        os.makedirs(os.path.join(FALLBACK_DIR, day), exist_ok=True)
+        with open(shard_path(day, 'lock'), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def applaud_count(drop):
+    applauds = drop.get('applauds', 0)
+    return len(applauds) if isinstance(applauds, list) else applauds
+
+def apply_journal_record(drops, record):
+    """Apply one journal record to the {id: drop} state; used for both replay and live writes"""
+    op = record['op']
+    if op == 'put':
+        drops[record['drop']['id']] = record['drop']
+        return
+    if op == 'delete':
+        for drop_id in record['ids']:
+            drops.pop(drop_id, None)
+        return
+    
+    drop = drops.get(record['id'])
+    if drop is None:
+        return
+    if op == 'applaud':
+        drop['applauds'] = min(MAX_APPLAUDS, max(0, applaud_count(drop) + record['delta']))
+    elif op == 'comment_add':
+        drop.setdefault('discussions', []).append(record['comment'])
+    elif op == 'comment_edit':
+        for comment in drop.get('discussions', []):
+            if comment['id'] == record['comment_id']:
+                comment.update({'text': record['text'], 'edited': True, 'editedAt': record['editedAt']})
+    elif op == 'comment_delete':
+        drop['discussions'] = [c for c in drop.get('discussions', []) if c['id'] != record['comment_id']]
+    elif op == 'update':
+        drop.update(record['fields'])
+    if 'seq' in record:
+        drop['changeSeq'] = record['seq']
+
+def content_key(drop):
+    return (drop.get('contentHash'), drop.get('filename'))
+
+def index_journal_record(state, record):
+    """Keep a shard's (contentHash, filename) -> id index in step with a record about to be applied"""
+    index = state['content_index']
+    if record['op'] == 'put':
+        previous = state['drops'].get(record['drop']['id'])
+        if previous is not None:
+            index.pop(content_key(previous), None)
+        if record['drop'].get('contentHash'):
+            index[content_key(record['drop'])] = record['drop']['id']
+    elif record['op'] == 'delete':
+        for drop_id in record['ids']:
+            if drop_id in state['drops']:
+                index.pop(content_key(state['drops'][drop_id]), None)
+
+def start_journal(day, generation):
+    """Atomically replace a shard's journal with an empty one for the given generation"""
+    journal_file = shard_path(day, 'journal.ndjson')
+    with open(journal_file + '.tmp', 'w') as f:
+        f.write(json.dumps({'op': 'begin', 'generation': generation}) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(journal_file + '.tmp', journal_file)
+
+def refresh_shard(day):
+    """Bring a shard's in-memory state up to date with its snapshot and journal (caller holds the lock)"""
+    snapshot_file = shard_path(day, 'snapshot.json')
+    journal_file = shard_path(day, 'journal.ndjson')
+    snapshot_mtime = os.stat(snapshot_file).st_mtime_ns if os.path.exists(snapshot_file) else None
+    if not os.path.exists(journal_file):
+        generation, _ = read_shard_snapshot(day)
+        start_journal(day, generation + 1)
+    journal_stat = os.stat(journal_file)
+    
+    state = shard_states.setdefault(day, {'drops': None, 'unsynced': 0, 'last_fsync': 0.0, 'compacting': False})
+    if (state['drops'] is None or
+            state['snapshot_mtime'] != snapshot_mtime or
+            state['journal_inode'] != journal_stat.st_ino or
+            journal_stat.st_size < state['journal_offset']):
+        # First load in this process, or another process compacted: start again from the snapshot
+        generation, snapshot_drops = read_shard_snapshot(day)
+        state.update({
+            'drops': {drop['id']: drop for drop in snapshot_drops},
+            'content_index': {content_key(drop): drop['id'] for drop in snapshot_drops if drop.get('contentHash')},
+            'generation': generation,
+            'snapshot_mtime': snapshot_mtime,
+            'journal_inode': journal_stat.st_ino,
+            'journal_offset': 0,
+            'records': 0
+        })
+    
+    if journal_stat.st_size == state['journal_offset']:
+        return state
+    
+    offset = state['journal_offset']
+    with open(journal_file, 'rb') as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b'\n'):
+                # Torn write from a crash: drop the partial record so later appends stay parseable
+                os.truncate(journal_file, offset)
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                print(f"File: Skipping corrupt journal record in shard {day} at offset {offset}")
+                offset += len(line)
+                continue
+            offset += len(line)
+            if record['op'] == 'begin':
+                if record['generation'] <= state['generation']:
+                    # Crash between writing a snapshot and starting its journal: already applied
+                    start_journal(day, state['generation'] + 1)
+                    return refresh_shard(day)
+                continue
+            index_journal_record(state, record)
+            apply_journal_record(state['drops'], record)
+            state['records'] += 1
+    state['journal_offset'] = offset
+    return state
+
+def append_journal_record(day, record):
+    """Append one record to a shard, fsyncing in batches, and apply it to the state (caller holds the lock)"""
+    state = shard_states[day]
+    with open(shard_path(day, 'journal.ndjson'), 'ab') as f:
+        f.write(json.dumps(record).encode('utf-8') + b'\n')
+        f.flush()
+        state['unsynced'] += 1
+        if (state['unsynced'] >= JOURNAL_FSYNC_BATCH or
+                time.time() - state['last_fsync'] >= JOURNAL_FSYNC_INTERVAL_SECONDS):
+            os.fsync(f.fileno())
+            state['unsynced'] = 0
+            state['last_fsync'] = time.time()
+        elif not state.get('fsync_scheduled'):
+            # A batch that goes idle before it fills up is synced by a timer instead
+            timer = threading.Timer(JOURNAL_FSYNC_INTERVAL_SECONDS, sync_shard_journal, args=(day,))
+            timer.daemon = True
+            state['fsync_scheduled'] = True
+            timer.start()
+        state['journal_offset'] = f.tell()
+    index_journal_record(state, record)
+    apply_journal_record(state['drops'], record)
+    state['records'] += 1
+
+def sync_shard_journal(day):
+    """fsync the unsynced tail of a shard's journal (run by the idle timer of append_journal_record)"""
+    state = shard_states.get(day)
+    if state is None:
+        return  # Expired since the timer was started
+    try:
+        with shard_lock(day):
+            state['fsync_scheduled'] = False
+            if state['unsynced'] and shard_states.get(day) is state:
+                fd = os.open(shard_path(day, 'journal.ndjson'), os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                state['unsynced'] = 0
+                state['last_fsync'] = time.time()
+    except Exception as e:
+        print(f"File: Journal fsync of shard {day} failed: {e}")
+
+def shard_mutate(day, decide):
+    """Run decide(drops) -> (record or None, result) against a fresh shard and journal the record"""
+    with shard_lock(day):
+        state = refresh_shard(day)
+        record, result = decide(state['drops'])
+        if record is not None:
+            append_journal_record(day, record)
+        needs_compaction = state['records'] >= JOURNAL_COMPACT_THRESHOLD and not state['compacting']
+        if needs_compaction:
+            state['compacting'] = True
+    if needs_compaction:
+        threading.Thread(target=compact_shard, args=(day,), name='sounddrop-compaction', daemon=True).start()
+    return result
+
+def compact_shard(day):
+    """Fold a shard's journal into a new snapshot and start an empty journal"""
+    state = None
+    try:
+        with shard_lock(day):
+            # expire_fallback_shards may have moved the shard away since compaction was scheduled
+            state = shard_states.get(day)
+            if state is None:
+                return
+            refresh_shard(day)
+            generation = state['generation'] + 1
+            snapshot_file = shard_path(day, 'snapshot.json')
+            # The slow part (serializing and fsyncing the snapshot) only holds this shard's lock
+            with open(snapshot_file + '.tmp', 'w') as f:
+                json.dump({'generation': generation, 'drops': list(state['drops'].values())}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            with STORAGE_LOCK:
+                os.replace(snapshot_file + '.tmp', snapshot_file)
+                # A crash here leaves an old-generation journal, which replay then ignores
+                start_journal(day, generation + 1)
+                journal_stat = os.stat(shard_path(day, 'journal.ndjson'))
+                state.update({
+                    'generation': generation,
+                    'snapshot_mtime': os.stat(snapshot_file).st_mtime_ns,
+                    'journal_inode': journal_stat.st_ino,
+                    'journal_offset': journal_stat.st_size,
+                    'records': 0
+                })
+            print(f"File: Compacted shard {day} into snapshot generation {generation} ({len(state['drops'])} drops)")
+    except Exception as e:
+        print(f"File: Compaction of shard {day} failed: {e}")
+    finally:
+        if state is not None:
+            state['compacting'] = False
+
+def migrate_legacy_fallback():
+    """Split the pre-partitioning single-file store (STORAGE_FILE + journal) into day shards, once"""
+    if not os.path.exists(STORAGE_FILE) and not os.path.exists(LEGACY_JOURNAL_FILE):
+        return
+    with STORAGE_LOCK:
+        if not os.path.exists(STORAGE_FILE) and not os.path.exists(LEGACY_JOURNAL_FILE):
+            return
+        drops = {}
+        generation = 0
         if os.path.exists(STORAGE_FILE):
             with open(STORAGE_FILE, 'r') as f:
-                data = json.load(f)
-                
-                # Archive drops older than 7 days to research database before filtering
-                now = datetime.datetime.now().timestamp() * 1000
-                seven_days_ms = 7 * 24 * 60 * 60 * 1000  # 7 days in milliseconds
-                expired_drops = [drop for drop in data if (now - drop['timestamp']) >= seven_days_ms]
-                
-                # Archive expired drops for research (if any)
-                if expired_drops:
-                    print(f"Found {len(expired_drops)} expired drops (>7 days) to archive")
-                    archived_count = 0
-                    for drop in expired_drops:
-                        if archive_to_research_db(drop):
-                            archived_count += 1
-                    print(f"Successfully archived {archived_count}/{len(expired_drops)} drops")
-                    
-                    # Remove archived drops from main storage to prevent re-processing
-                    remaining_drops = [drop for drop in data if (now - drop['timestamp']) < seven_days_ms]
-                    save_sound_drops(remaining_drops)
-                
-                # Return sounds from the last 30 hours to account for timezone differences
-                # Frontend will do the precise filtering based on user's local midnight
-                thirty_hours_ms = 30 * 60 * 60 * 1000  # 30 hours in milliseconds
-                valid_drops = [drop for drop in data if (now - drop['timestamp']) < thirty_hours_ms]
-                print(f"File: Returning {len(valid_drops)} drops from last 30 hours (frontend will filter to local midnight)")
-                return valid_drops
+                snapshot = json.load(f)
+            if isinstance(snapshot, dict):
+                generation, snapshot = snapshot['generation'], snapshot['drops']
+            drops = {drop['id']: drop for drop in snapshot}
+        if os.path.exists(LEGACY_JOURNAL_FILE):
+            with open(LEGACY_JOURNAL_FILE, 'rb') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record['op'] == 'begin':
+                        if record['generation'] <= generation:
+                            break  # Already folded into the snapshot
+                        continue
+                    apply_journal_record(drops, record)
+    
+    by_shard = {}
+    for drop in drops.values():
+        by_shard.setdefault(shard_for_timestamp(drop['timestamp']), []).append(drop)
+    for day, shard_drops in by_shard.items():
+        with shard_lock(day):
+            refresh_shard(day)
+            for drop in shard_drops:
+                append_journal_record(day, {'op': 'put', 'drop': drop})
+    for legacy_file in (STORAGE_FILE, LEGACY_JOURNAL_FILE):
+        if os.path.exists(legacy_file):
+            os.replace(legacy_file, legacy_file + '.migrated')
+    print(f"File: Migrated {len(drops)} drops from {STORAGE_FILE} into {len(by_shard)} day shards")
+
+def shard_load_drops(start_ms=None, end_ms=None):
+    """Copies of the fallback drops with start_ms <= timestamp < end_ms, reading only overlapping shards"""
+    migrate_legacy_fallback()
+    drops = []
+    for day in list_shards():
+        shard_start, shard_end = shard_bounds(day)
+        if (start_ms is not None and shard_end <= start_ms) or (end_ms is not None and shard_start >= end_ms):
+            continue
+        with shard_lock(day):
+            state = refresh_shard(day)
+            drops.extend(copy.deepcopy([
+                drop for drop in state['drops'].values()
+                if (start_ms is None or drop['timestamp'] >= start_ms) and
+                   (end_ms is None or drop['timestamp'] < end_ms)
+            ]))
+    return drops
+
+def shard_insert(drop):
+    """Journal a new (or replacement) drop into the shard for its timestamp"""
+    migrate_legacy_fallback()
+    day = shard_for_timestamp(drop['timestamp'])
+    drop_shards[drop['id']] = day
+    return shard_mutate(day, lambda drops: ({'op': 'put', 'drop': drop}, True))
+
+def find_drop_shard(drop_id):
+    """Day shard holding a drop id, checking the remembered shard before scanning newest first"""
+    migrate_legacy_fallback()
+    remembered = drop_shards.get(drop_id)
+    candidates = ([remembered] if remembered else []) + [day for day in reversed(list_shards()) if day != remembered]
+    for day in candidates:
+        if not os.path.isdir(os.path.join(FALLBACK_DIR, day)):
+            continue
+        with shard_lock(day):
+            if drop_id in refresh_shard(day)['drops']:
+                drop_shards[drop_id] = day
+                return day
+    return None
+
+def shard_find_duplicate(drop):
+    """Copy of a shard drop with the same id, or the same content hash and filename"""
+    day = find_drop_shard(drop['id'])
+    if day is not None:
+        with shard_lock(day):
+            return 'id', copy.deepcopy(refresh_shard(day)['drops'][drop['id']])
+    if not drop.get('contentHash'):
+        return None, None
+    for day in reversed(list_shards()):
+        with shard_lock(day):
+            state = refresh_shard(day)
+            existing_id = state['content_index'].get(content_key(drop))
+            if existing_id is not None:
+                return 'content', copy.deepcopy(state['drops'][existing_id])
+    return None, None
+
+def shard_mutate_drop(drop_id, decide):
+    """shard_mutate on the shard holding drop_id; decide sees an empty shard if the drop is unknown"""
+    day = find_drop_shard(drop_id)
+    if day is None:
+        record, result = decide({})
+        return result
+    return shard_mutate(day, decide)
+
+def read_change_seq_state():
+    """The file engine's change sequence as {'seq': last value, 'pending': {value: start time}}"""
+    try:
+        with open(CHANGE_SEQ_FILE, 'r') as f:
+            state = json.loads(f.read() or '0')
+    except FileNotFoundError:
+        state = 0
+    if isinstance(state, int):
+        state = {'seq': state, 'pending': {}}  # Written before pending values were tracked
+    return state
+
+@contextlib.contextmanager
+def change_seq_state():
+    """Exclusive access to the file engine's change sequence state, shared by threads and workers"""
+    with CHANGE_SEQ_LOCK:
+        os.makedirs(FALLBACK_DIR, exist_ok=True)
+        with open(CHANGE_SEQ_FILE + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                state = read_change_seq_state()
+                yield state
+                with open(CHANGE_SEQ_FILE + '.tmp', 'w') as f:
+                    json.dump(state, f)
+                os.replace(CHANGE_SEQ_FILE + '.tmp', CHANGE_SEQ_FILE)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+@contextlib.contextmanager
+def shard_change_seq():
+    """Yield the next value of the file engine's change sequence, pending until the block exits"""
+    with change_seq_state() as state:
+        now = time.time()
+        state['pending'] = {value: started for value, started in state['pending'].items()
+                            if started >= now - SEQUENCE_PENDING_TIMEOUT_SECONDS}
+        state['seq'] += 1
+        seq = state['seq']
+        state['pending'][str(seq)] = now
+    try:
+        yield seq
+    finally:
+        with change_seq_state() as state:
+            state['pending'].pop(str(seq), None)
+
+def shard_committed_change_seq():
+    state = read_change_seq_state()
+    return committed_sequence(state['seq'], state['pending'])
+
+@contextlib.contextmanager
+def tombstone_lock():
+    """Exclusive lock over the file engine's tombstone file (which pruning replaces)"""
+    with CHANGE_SEQ_LOCK:
+        os.makedirs(FALLBACK_DIR, exist_ok=True)
+        with open(TOMBSTONE_FILE + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def shard_record_tombstones(drop_ids, seq):
+    """Remember deleted drop ids for delta sync"""
+    deleted_at = int(datetime.datetime.now().timestamp() * 1000)
+    with tombstone_lock():
+        with open(TOMBSTONE_FILE, 'a') as f:
+            for drop_id in drop_ids:
+                f.write(json.dumps({'id': drop_id, 'changeSeq': seq, 'deletedAt': deleted_at}) + '\n')
+
+def read_shard_tombstones():
+    if not os.path.exists(TOMBSTONE_FILE):
         return []
+    with open(TOMBSTONE_FILE, 'r') as f:
+        # A line still being appended has no newline yet; it is picked up by the next read
+        return [json.loads(line) for line in f if line.endswith('\n')]
+
+def shard_load_changes(since, start_ms):
+    """(drops, tombstones) with a change sequence above since, from the shards in the window"""
+    drops = [drop for drop in shard_load_drops(start_ms) if drop.get('changeSeq', 0) > since]
+    drops.sort(key=lambda drop: drop['changeSeq'])
+    tombstones = [
+        {'id': tombstone['id'], 'changeSeq': tombstone['changeSeq']}
+        for tombstone in read_shard_tombstones() if tombstone['changeSeq'] > since
+    ]
+    return drops, tombstones
+
+def prune_shard_tombstones(cutoff_ms):
+    """Drop tombstones older than cutoff_ms; clients that far behind resync in full anyway"""
+    with tombstone_lock():
+        tombstones = read_shard_tombstones()
+        kept = [tombstone for tombstone in tombstones if tombstone['deletedAt'] >= cutoff_ms]
+        if len(kept) == len(tombstones):
+            return
+        with open(TOMBSTONE_FILE + '.tmp', 'w') as f:
+            f.writelines(json.dumps(tombstone) + '\n' for tombstone in kept)
+        os.replace(TOMBSTONE_FILE + '.tmp', TOMBSTONE_FILE)
+
+def expire_fallback_shards(cutoff_ms):
+    """Move day shards that end before cutoff_ms into the archive directory, without reading them"""
+    expired_days = [day for day in list_shards() if shard_bounds(day)[1] <= cutoff_ms]
+    for day in expired_days:
+        os.makedirs(FALLBACK_ARCHIVE_DIR, exist_ok=True)
+        # Taking a change sequence value moves the export watermark past the drops set aside
+        with shard_lock(day), shard_change_seq():
+            os.replace(os.path.join(FALLBACK_DIR, day), os.path.join(FALLBACK_ARCHIVE_DIR, day))
+            shard_states.pop(day, None)
+    if expired_days:
+        print(f"File: Moved {len(expired_days)} expired day shards to {FALLBACK_ARCHIVE_DIR}")
+    return expired_days
+
+def read_archived_shard(day):
+    """All drops of a shard in the archive directory (snapshot plus journal replay)"""
+    drops = {}
+    generation = 0
+    snapshot_file = shard_path(day, 'snapshot.json', FALLBACK_ARCHIVE_DIR)
+    if os.path.exists(snapshot_file):
+        with open(snapshot_file, 'r') as f:
+            snapshot = json.load(f)
+        generation = snapshot['generation']
+        drops = {drop['id']: drop for drop in snapshot['drops']}
+    journal_file = shard_path(day, 'journal.ndjson', FALLBACK_ARCHIVE_DIR)
+    if os.path.exists(journal_file):
+        with open(journal_file, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record['op'] == 'begin':
+                    if record['generation'] <= generation:
+                        break  # Already folded into the snapshot
+                    continue
+                apply_journal_record(drops, record)
+    return list(drops.values())
+
+def sqlite_connection():
+    """Per-thread SQLite connection in WAL mode (safe to share the file across gunicorn workers)"""
+    conn = getattr(sqlite_local, 'conn', None)
+    if conn is None:
+        os.makedirs(os.path.dirname(SQLITE_PATH), exist_ok=True)
+        conn = sqlite3.connect(SQLITE_PATH, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        conn.executescript(SQLITE_SCHEMA)
+        # Older databases lack the duplicate-detection and change-sequence columns
+        columns = {row['name'] for row in conn.execute('PRAGMA table_info(drops)')}
+        for column, column_type in (('content_hash', 'TEXT'), ('filename', 'TEXT'), ('change_seq', 'INTEGER')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE drops ADD COLUMN {column} {column_type}')
+        conn.execute(
+            'CREATE UNIQUE INDEX IF NOT EXISTS drops_content ON drops (content_hash, filename) '
+            'WHERE content_hash IS NOT NULL'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS drops_change_seq ON drops (change_seq)')
+        sqlite_local.conn = conn
+    return conn
+
+@contextlib.contextmanager
+def sqlite_transaction():
+    """Write transaction that takes the database write lock up front"""
+    conn = sqlite_connection()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
+
+def sqlite_rows_to_drops(conn, drop_rows):
+    """Assemble drop dicts from drop rows plus their discussions and applauds"""
+    drops = {}
+    for row in drop_rows:
+        drop = json.loads(row['doc'])
+        drop.update({'id': row['id'], 'timestamp': row['timestamp'], 'discussions': [], 'applauds': 0})
+        if row['change_seq'] is not None:
+            drop['changeSeq'] = row['change_seq']
+        drops[row['id']] = drop
+    ids = list(drops)
+    for start in range(0, len(ids), 500):
+        placeholders = ','.join('?' * len(ids[start:start + 500]))
+        for row in conn.execute(
+                f'SELECT * FROM discussions WHERE drop_id IN ({placeholders}) ORDER BY rowid',
+                ids[start:start + 500]):
+            comment = {'id': row['id'], 'timestamp': row['timestamp'], 'text': row['text'], 'author': row['author']}
+            if row['edited']:
+                comment.update({'edited': True, 'editedAt': row['edited_at']})
+            drops[row['drop_id']]['discussions'].append(comment)
+        for row in conn.execute(
+                f'SELECT drop_id, count FROM applauds WHERE drop_id IN ({placeholders})',
+                ids[start:start + 500]):
+            drops[row['drop_id']]['applauds'] = row['count']
+    return list(drops.values())
+
+def sqlite_apply_record(conn, record):
+    """Apply a fallback journal record as SQL (caller holds a write transaction)"""
+    op = record['op']
+    if op == 'put':
+        drop = record['drop']
+        doc = {key: value for key, value in drop.items()
+               if key not in ('id', 'timestamp', 'changeSeq', 'discussions', 'applauds')}
+        conn.execute(
+            'INSERT INTO drops (id, timestamp, content_hash, filename, change_seq, doc) VALUES (?, ?, ?, ?, ?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET timestamp = excluded.timestamp, content_hash = excluded.content_hash, '
+            'filename = excluded.filename, change_seq = excluded.change_seq, doc = excluded.doc',
+            (drop['id'], drop['timestamp'], drop.get('contentHash'), drop.get('filename'),
+             drop.get('changeSeq'), json.dumps(doc))
+        )
+        conn.execute('DELETE FROM discussions WHERE drop_id = ?', (drop['id'],))
+        for comment in drop.get('discussions', []):
+            sqlite_apply_record(conn, {'op': 'comment_add', 'id': drop['id'], 'comment': comment})
+        conn.execute(
+            'INSERT OR REPLACE INTO applauds (drop_id, count) VALUES (?, ?)',
+            (drop['id'], min(MAX_APPLAUDS, applaud_count(drop)))
+        )
+    elif op == 'delete':
+        conn.executemany('DELETE FROM drops WHERE id = ?', [(drop_id,) for drop_id in record['ids']])
+        if 'seq' in record:
+            # Deletions made through the API (not archiving) leave tombstones for delta sync
+            deleted_at = int(datetime.datetime.now().timestamp() * 1000)
+            conn.executemany(
+                'INSERT INTO tombstones (drop_id, change_seq, deleted_at) VALUES (?, ?, ?)',
+                [(drop_id, record['seq'], deleted_at) for drop_id in record['ids']]
+            )
+        return
+    elif op == 'applaud':
+        conn.execute(
+            'UPDATE applauds SET count = MIN(?, MAX(0, count + ?)) WHERE drop_id = ?',
+            (MAX_APPLAUDS, record['delta'], record['id'])
+        )
+    elif op == 'comment_add':
+        comment = record['comment']
+        conn.execute(
+            'INSERT OR REPLACE INTO discussions (drop_id, id, timestamp, text, author, edited, edited_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (record['id'], comment['id'], comment.get('timestamp'), comment.get('text'),
+             comment.get('author'), 1 if comment.get('edited') else 0, comment.get('editedAt'))
+        )
+    elif op == 'comment_edit':
+        conn.execute(
+            'UPDATE discussions SET text = ?, edited = 1, edited_at = ? WHERE drop_id = ? AND id = ?',
+            (record['text'], record['editedAt'], record['id'], record['comment_id'])
+        )
+    elif op == 'comment_delete':
+        conn.execute('DELETE FROM discussions WHERE drop_id = ? AND id = ?', (record['id'], record['comment_id']))
+    elif op == 'update':
+        # Only fields kept in the doc column are updated this way
+        row = conn.execute('SELECT doc FROM drops WHERE id = ?', (record['id'],)).fetchone()
+        if row is not None:
+            conn.execute(
+                'UPDATE drops SET doc = ? WHERE id = ?', (json.dumps({**json.loads(row[0]), **record['fields']}), record['id'])
+            )
+    if op != 'put' and 'seq' in record:
+        conn.execute('UPDATE drops SET change_seq = ? WHERE id = ?', (record['seq'], record['id']))
+
+def sqlite_next_change_seq(conn):
+    """Next value of the SQLite engine's change sequence (caller holds a write transaction)"""
+    conn.execute(
+        "INSERT INTO counters (name, value) VALUES ('feed_changes', 1) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + 1"
+    )
+    return conn.execute("SELECT value FROM counters WHERE name = 'feed_changes'").fetchone()['value']
+
+def sqlite_committed_change_seq():
+    """Last committed change sequence; write transactions are serialized, so none is still pending"""
+    row = sqlite_connection().execute("SELECT value FROM counters WHERE name = 'feed_changes'").fetchone()
+    return row['value'] if row else 0
+
+def sqlite_load_drops(start_ms=None, end_ms=None):
+    """Drops with start_ms <= timestamp < end_ms, through the timestamp index"""
+    conn = sqlite_connection()
+    rows = conn.execute(
+        'SELECT id, timestamp, change_seq, doc FROM drops WHERE timestamp >= ? AND timestamp < ? ORDER BY timestamp DESC',
+        (start_ms if start_ms is not None else float('-inf'), end_ms if end_ms is not None else float('inf'))
+    ).fetchall()
+    return sqlite_rows_to_drops(conn, rows)
+
+def sqlite_expired_drops(cutoff_ms, limit):
+    """Up to limit of the oldest drops with timestamp < cutoff_ms, through the timestamp index"""
+    conn = sqlite_connection()
+    rows = conn.execute(
+        'SELECT id, timestamp, change_seq, doc FROM drops WHERE timestamp < ? ORDER BY timestamp LIMIT ?',
+        (cutoff_ms, limit)
+    ).fetchall()
+    return sqlite_rows_to_drops(conn, rows)
+
+def sqlite_load_changes(since, start_ms):
+    """(drops, tombstones) with a change sequence above since, through the change_seq indexes"""
+    conn = sqlite_connection()
+    rows = conn.execute(
+        'SELECT id, timestamp, change_seq, doc FROM drops WHERE change_seq > ? AND timestamp >= ? ORDER BY change_seq',
+        (since, start_ms)
+    ).fetchall()
+    tombstones = [
+        {'id': row['drop_id'], 'changeSeq': row['change_seq']}
+        for row in conn.execute(
+            'SELECT drop_id, change_seq FROM tombstones WHERE change_seq > ? ORDER BY change_seq', (since,))
+    ]
+    return sqlite_rows_to_drops(conn, rows), tombstones
+
+def sqlite_find_duplicate(drop):
+    """Drop with the same id, or the same content hash and filename (both indexed lookups)"""
+    conn = sqlite_connection()
+    rows = conn.execute('SELECT id, timestamp, change_seq, doc FROM drops WHERE id = ?', (drop['id'],)).fetchall()
+    if rows:
+        return 'id', sqlite_rows_to_drops(conn, rows)[0]
+    if drop.get('contentHash'):
+        rows = conn.execute(
+            'SELECT id, timestamp, change_seq, doc FROM drops WHERE content_hash = ? AND filename = ?',
+            (drop['contentHash'], drop.get('filename'))
+        ).fetchall()
+        if rows:
+            return 'content', sqlite_rows_to_drops(conn, rows)[0]
+    return None, None
+
+def sqlite_mutate_drop(drop_id, decide):
+    """Run decide({id: drop}) -> (record or None, result) inside one write transaction"""
+    with sqlite_transaction() as conn:
+        rows = conn.execute('SELECT id, timestamp, change_seq, doc FROM drops WHERE id = ?', (drop_id,)).fetchall()
+        record, result = decide({drop['id']: drop for drop in sqlite_rows_to_drops(conn, rows)})
+        if record is not None:
+            sqlite_apply_record(conn, record)
+    return result
+
+def fallback_load_drops(start_ms=None, end_ms=None):
+    """Drops from the configured fallback engine with start_ms <= timestamp < end_ms"""
+    if FALLBACK_ENGINE == 'sqlite':
+        return sqlite_load_drops(start_ms, end_ms)
+    return shard_load_drops(start_ms, end_ms)
+
+def fallback_load_changes(since, start_ms):
+    """(drops, tombstones) changed after the change cursor since, from the configured fallback engine"""
+    if FALLBACK_ENGINE == 'sqlite':
+        return sqlite_load_changes(since, start_ms)
+    return shard_load_changes(since, start_ms)
+
+def fallback_insert(drop):
+    """Insert (or replace) a drop in the configured fallback engine, stamping its change sequence"""
+    if FALLBACK_ENGINE == 'sqlite':
+        with sqlite_transaction() as conn:
+            drop['changeSeq'] = sqlite_next_change_seq(conn)
+            sqlite_apply_record(conn, {'op': 'put', 'drop': drop})
+        return True
+    with shard_change_seq() as seq:
+        drop['changeSeq'] = seq
+        return shard_insert(drop)
+
+def fallback_committed_change_seq():
+    """Change cursor of the configured fallback engine up to which every change has committed"""
+    if FALLBACK_ENGINE == 'sqlite':
+        return sqlite_committed_change_seq()
+    return shard_committed_change_seq()
+
+def fallback_find_duplicate(drop):
+    """(reason, existing drop) from the configured fallback engine, or (None, None)"""
+    if FALLBACK_ENGINE == 'sqlite':
+        return sqlite_find_duplicate(drop)
+    return shard_find_duplicate(drop)
+
+def fallback_mutate_drop(drop_id, decide):
+    """Validate and apply a single-drop mutation in the configured fallback engine
+
+    Each applied record is stamped with the next change sequence; deletions leave tombstones.
+    """
+    if FALLBACK_ENGINE == 'sqlite':
+        def stamped(drops):
+            record, result = decide(drops)
+            if record is not None:
+                record['seq'] = sqlite_next_change_seq(sqlite_connection())
+            return record, result
+        return sqlite_mutate_drop(drop_id, stamped)
+    
+    with contextlib.ExitStack() as pending:
+        # The sequence value stays pending until the journal record and any tombstones are written
+        deletions = []
+        def stamped(drops):
+            record, result = decide(drops)
+            if record is not None:
+                record['seq'] = pending.enter_context(shard_change_seq())
+                if record['op'] == 'delete':
+                    deletions.append(record)
+            return record, result
+        result = shard_mutate_drop(drop_id, stamped)
+        for record in deletions:
+            shard_record_tombstones(record['ids'], record['seq'])
+    return result
+
+def prune_fallback_tombstones(cutoff_ms):
+    """Forget fallback tombstones of drops deleted before cutoff_ms"""
+    if FALLBACK_ENGINE == 'sqlite':
+        with sqlite_transaction() as conn:
+            conn.execute('DELETE FROM tombstones WHERE deleted_at < ?', (cutoff_ms,))
+        return
+    prune_shard_tombstones(cutoff_ms)
+
+def archive_fallback_drops(cutoff_ms, batch_size):
+    """Archive expired drops held by the fallback engine; returns (archived, new archive records)"""
+    archived_count = 0
+    inserted_count = 0
+    if FALLBACK_ENGINE == 'sqlite':
+        while True:
+            expired = sqlite_expired_drops(cutoff_ms, batch_size)
+            if not expired:
+                break
+            inserted_count += archive_drops_batch(expired)
+            with sqlite_transaction() as conn:
+                sqlite_apply_record(conn, {'op': 'delete', 'ids': [drop['id'] for drop in expired]})
+            archived_count += len(expired)
+        return archived_count, inserted_count
+    
+    # Day shards already moved aside by expire_fallback_shards
+    for day in list_shards(FALLBACK_ARCHIVE_DIR):
+        expired = read_archived_shard(day)
+        for start in range(0, len(expired), batch_size):
+            inserted_count += archive_drops_batch(expired[start:start + batch_size])
+        shutil.rmtree(os.path.join(FALLBACK_ARCHIVE_DIR, day))
+        archived_count += len(expired)
+        print(f"Archiver: Archived fallback shard {day} ({len(expired)} drops)")
+    return archived_count, inserted_count
+
+def active_drop_filter(drop_id):
+    """Mongo filter matching one active (not archived) drop"""
+    return {'id': drop_id, 'archived': {'$ne': True}}
+
+def find_duplicate_drop(drop):
+    """(reason, existing drop) for a drop with the same id, or the same content hash and filename"""
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            collection = research_db.active_sounds
+            existing = collection.find_one({'id': drop['id']}, {'_id': 0})
+            if existing is not None:
+                return 'id', existing
+            if drop.get('contentHash'):
+                existing = collection.find_one(
+                    {'contentHash': drop['contentHash'], 'filename': drop.get('filename')}, {'_id': 0}
+                )
+                if existing is not None:
+                    return 'content', existing
+            return None, None
+        except Exception as e:
+            print(f"MongoDB duplicate check failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    return fallback_find_duplicate(drop)
+
+@invalidates_feed_cache
+def insert_sound_drop(drop):
+    """Insert a single new drop"""
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            with mongo_sequence('feed_changes') as seq:
+                drop['changeSeq'] = seq
+                # insert_one adds an ObjectId to the document it is given, so pass a copy
+                research_db.active_sounds.insert_one(dict(drop))
+            update_stats('active_sounds', stats_increments([drop]))
+            print(f"MongoDB: Inserted sound drop {drop['id']}")
+            return True
+        except DuplicateKeyError:
+            raise  # Lost a race with an identical drop; the caller reports the existing one
+        except Exception as e:
+            print(f"MongoDB insert failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    try:
+        fallback_insert(drop)
+        print(f"File: Inserted sound drop {drop['id']}")
+        return True
     except Exception as e:
-        print(f"Error loading sound drops: {e}")
-        return []
+        print(f"Error inserting sound drop: {e}")
+        return False
+
+@invalidates_feed_cache
+def update_applauds(drop_id, applaud):
+    """Atomically add or remove one applaud; returns (status, applauds)
+
+    status is 'ok', 'not_found' or 'limit' (MAX_APPLAUDS already reached).
+    """
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            collection = research_db.active_sounds
+            for _ in range(2):
+                if applaud:
+                    query = {**active_drop_filter(drop_id), '$or': [
+                        {'applauds': {'$lt': MAX_APPLAUDS}},
+                        {'applauds': {'$exists': False}}
+                    ]}
+                    change = 1
+                else:
+                    query = {**active_drop_filter(drop_id), 'applauds': {'$gt': 0}}
+                    change = -1
+                with mongo_sequence('feed_changes') as seq:
+                    updated = collection.find_one_and_update(
+                        query, {'$inc': {'applauds': change}, '$set': {'changeSeq': seq}},
+                        projection={'applauds': 1},
+                        return_document=ReturnDocument.AFTER
+                    )
+                if updated is not None:
+                    return 'ok', updated['applauds']
+                
+                current = collection.find_one(active_drop_filter(drop_id), {'applauds': 1, '_id': 0})
+                if current is None:
+                    return 'not_found', None
+                applauds = current.get('applauds', 0)
+                if isinstance(applauds, list):
+                    # Fix old array format - convert to count, then retry the increment
+                    collection.update_one(
+                        {**active_drop_filter(drop_id), 'applauds': applauds},
+                        {'$set': {'applauds': len(applauds)}}
+                    )
+                    continue
+                return ('limit' if applaud else 'ok'), applauds
+            return 'ok', len(applauds)
+        except Exception as e:
+            print(f"MongoDB applaud update failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    def decide(drops):
+        target_drop = drops.get(drop_id)
+        if target_drop is None:
+            return None, ('not_found', None)
+        applauds = applaud_count(target_drop)
+        if applaud and applauds >= MAX_APPLAUDS:
+            return None, ('limit', applauds)
+        new_applauds = applauds + 1 if applaud else max(0, applauds - 1)
+        if new_applauds == applauds:
+            return None, ('ok', applauds)
+        return {'op': 'applaud', 'id': drop_id, 'delta': new_applauds - applauds}, ('ok', new_applauds)
+    return fallback_mutate_drop(drop_id, decide)
+
+@invalidates_feed_cache
+def push_discussion(drop_id, comment):
+    """Append a comment to a drop; returns False if the drop does not exist"""
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            with mongo_sequence('feed_changes') as seq:
+                result = research_db.active_sounds.update_one(
+                    active_drop_filter(drop_id),
+                    {'$push': {'discussions': comment}, '$set': {'changeSeq': seq}}
+                )
+            if result.matched_count > 0:
+                update_stats('active_sounds', {'comments': 1})
+            return result.matched_count > 0
+        except Exception as e:
+            print(f"MongoDB comment insert failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    def decide(drops):
+        if drop_id not in drops:
+            return None, False
+        return {'op': 'comment_add', 'id': drop_id, 'comment': comment}, True
+    return fallback_mutate_drop(drop_id, decide)
+
+@invalidates_feed_cache
+def update_discussion(drop_id, comment_id, text):
+    """Edit a comment in place; returns (status, comment) with status 'ok', 'not_found' or 'comment_not_found'"""
+    edited_at = int(datetime.datetime.now().timestamp() * 1000)
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            collection = research_db.active_sounds
+            with mongo_sequence('feed_changes') as seq:
+                updated = collection.find_one_and_update(
+                    {**active_drop_filter(drop_id), 'discussions.id': comment_id},
+                    {'$set': {
+                        'discussions.$.text': text,
+                        'discussions.$.edited': True,
+                        'discussions.$.editedAt': edited_at,
+                        'changeSeq': seq
+                    }},
+                    projection={'discussions': {'$elemMatch': {'id': comment_id}}},
+                    return_document=ReturnDocument.AFTER
+                )
+            if updated is not None:
+                return 'ok', updated['discussions'][0]
+            if collection.find_one(active_drop_filter(drop_id), {'_id': 1}) is None:
+                return 'not_found', None
+            return 'comment_not_found', None
+        except Exception as e:
+            print(f"MongoDB comment update failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    def decide(drops):
+        target_drop = drops.get(drop_id)
+        if target_drop is None:
+            return None, ('not_found', None)
+        comment = next((c for c in target_drop.get('discussions', []) if c['id'] == comment_id), None)
+        if comment is None:
+            return None, ('comment_not_found', None)
+        record = {'op': 'comment_edit', 'id': drop_id, 'comment_id': comment_id, 'text': text, 'editedAt': edited_at}
+        return record, ('ok', {**comment, 'text': text, 'edited': True, 'editedAt': edited_at})
+    return fallback_mutate_drop(drop_id, decide)
+
+@invalidates_feed_cache
+def pull_discussion(drop_id, comment_id):
+    """Remove a comment; returns 'ok', 'not_found' or 'comment_not_found'"""
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            collection = research_db.active_sounds
+            with mongo_sequence('feed_changes') as seq:
+                result = collection.update_one(
+                    {**active_drop_filter(drop_id), 'discussions.id': comment_id},
+                    {'$pull': {'discussions': {'id': comment_id}}, '$set': {'changeSeq': seq}}
+                )
+            if result.matched_count > 0:
+                update_stats('active_sounds', {'comments': -1})
+                return 'ok'
+            if collection.find_one(active_drop_filter(drop_id), {'_id': 1}) is None:
+                return 'not_found'
+            return 'comment_not_found'
+        except Exception as e:
+            print(f"MongoDB comment delete failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    def decide(drops):
+        target_drop = drops.get(drop_id)
+        if target_drop is None:
+            return None, 'not_found'
+        if not any(c['id'] == comment_id for c in target_drop.get('discussions', [])):
+            return None, 'comment_not_found'
+        return {'op': 'comment_delete', 'id': drop_id, 'comment_id': comment_id}, 'ok'
+    return fallback_mutate_drop(drop_id, decide)
+
+@invalidates_feed_cache
+def remove_sound_drop(drop_id):
+    """Delete a drop by id (matching both string and int ids); returns True if it existed"""
+    try:
+        drop_id_int = int(drop_id)
+    except ValueError:
+        drop_id_int = None
+    
+    deleted = False
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            # Non-numeric ids only match as strings ({'id': None} would match drops without an id)
+            id_clauses = [{'id': drop_id}, {'id': str(drop_id)}]
+            if drop_id_int is not None:
+                id_clauses.append({'id': drop_id_int})
+            removed = research_db.active_sounds.find_one_and_delete(
+                {'$or': id_clauses},
+                projection={'id': 1, 'theme': 1, 'type': 1, 'timestamp': 1, 'discussions.id': 1, 'archived': 1}
+            )
+            print(f"🗄️ MongoDB delete result: {0 if removed is None else 1} documents deleted")
+            if removed is not None:
+                if not removed.get('archived'):
+                    update_stats('active_sounds', stats_increments([removed], -1))
+                with mongo_sequence('feed_changes') as seq:
+                    research_db.tombstones.insert_one({
+                        'id': removed['id'],
+                        'changeSeq': seq,
+                        'deletedAt': datetime.datetime.utcnow()
+                    })
+                deleted = True
+        except Exception as e:
+            print(f"MongoDB delete failed: {e}")
+            record_mongo_error(e)
+    
+    # The fallback store may also hold a copy written while MongoDB was unavailable
+    for candidate_id in (drop_id_int, str(drop_id)):
+        def decide(drops, candidate_id=candidate_id):
+            if candidate_id not in drops:
+                return None, False
+            return {'op': 'delete', 'ids': [candidate_id]}, True
+        if candidate_id is not None and fallback_mutate_drop(candidate_id, decide):
+            drop_shards.pop(candidate_id, None)
+            deleted = True
+    return deleted
 
-def save_sound_drops(drops):
-    """Save sound drops - uses MongoDB on Vercel, file storage as fallback"""
-    try:
-        # Try MongoDB first (primary storage on Vercel)
-        if USE_MONGODB_PRIMARY and init_mongodb():
-            try:
-                collection = research_db.active_sounds
-                
-                if drops:
-                    # Use upsert to update existing or insert new drops
-                    for drop in drops:
-                        mongo_drop = drop.copy()
-                        drop_id = mongo_drop['id']
-                        
-                        # Use upsert to avoid duplicates
-                        collection.replace_one(
-                            {'id': drop_id},  # Find by id field
-                            mongo_drop,       # Replace with full document
-                            upsert=True       # Insert if not exists
-                        )
-                
-                print(f"MongoDB: Upserted {len(drops)} sound drops")
-                return True
-                
-            except Exception as e:
-                print(f"MongoDB save failed, falling back to file storage: {e}")
-        
-        # Fallback to file storage
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(STORAGE_FILE), exist_ok=True)
-        with open(STORAGE_FILE, 'w') as f:
-            json.dump(drops, f)
-        print(f"File: Saved {len(drops)} sound drops to storage")
-        return True
-    except Exception as e:
-        print(f"Error saving sound drops: {e}")
-        return False
+@invalidates_feed_cache
+def update_drop_fields(drop_id, fields):
+    """Set derived fields (such as the stored audio) on an active drop; returns True if it exists"""
+    if USE_MONGODB_PRIMARY and init_mongodb():
+        try:
+            with mongo_sequence('feed_changes') as seq:
+                result = research_db.active_sounds.update_one(
+                    active_drop_filter(drop_id), {'$set': {**fields, 'changeSeq': seq}}
+                )
+            return result.matched_count > 0
+        except Exception as e:
+            print(f"MongoDB drop update failed, falling back to file storage: {e}")
+            record_mongo_error(e)
+    
+    def decide(drops):
+        if drop_id not in drops:
+            return None, False
+        return {'op': 'update', 'id': drop_id, 'fields': fields}, True
+    return fallback_mutate_drop(drop_id, decide)
 
 # HTML template for the voice journaling interface
 JOURNAL_TEMPLATE = """
@@ -376,6 +2963,7 @@ JOURNAL_TEMPLATE = """
             const formData = new FormData();
             formData.append('audio', audioData);
             formData.append('type', type);
+            formData.append('source', 'journal');
             
             try {
                 const response = await fetch('/api/upload-audio', {
@@ -621,20 +3209,11 @@ ADMIN_DASHBOARD_TEMPLATE = """
             <div>Current Active</div>
         </div>
         <div class="stat-card">
-            <div class="stat-number">{{ archived_drops|length }}</div>
+            <div class="stat-number">{{ archived_count }}</div>
             <div>Archived</div>
         </div>
         <div class="stat-card">
-            <div class="stat-number">
-                {% set total_comments = 0 %}
-                {% for drop in current_drops %}
-                    {% set total_comments = total_comments + (drop.discussions|length) %}
-                {% endfor %}
-                {% for drop in archived_drops %}
-                    {% set total_comments = total_comments + (drop.discussions|length) %}
-                {% endfor %}
-                {{ total_comments }}
-            </div>
+            <div class="stat-number">{{ total_comments }}</div>
             <div>Total Comments</div>
         </div>
     </div>
@@ -673,8 +3252,10 @@ ADMIN_DASHBOARD_TEMPLATE = """
                 {% endif %}
             </div>
             <div class="drop-actions">
-                {% if drop.audioData %}
-                <button class="play-btn" onclick="playAudio('{{ drop.audioData }}', this)">▶️ Play</button>
+                {% if drop.audioBlobId %}
+                <button class="play-btn" onclick="playAudio('/api/audio/{{ drop.audioBlobId }}', this)">▶️ Play</button>
+                {% elif drop.hasAudioData %}
+                <button class="play-btn" onclick="playAudio('/admin/audio/current/{{ drop.id }}?key={{ key }}', this)">▶️ Play</button>
                 {% endif %}
             </div>
         </div>
@@ -684,7 +3265,7 @@ ADMIN_DASHBOARD_TEMPLATE = """
     
     {% if archived_drops %}
     <div class="section">
-        <div class="section-header">📦 Archived Drops (Research Data)</div>
+        <div class="section-header">📦 Archived Drops (Research Data) - page {{ page }}</div>
         {% for drop in archived_drops %}
         <div class="drop-item">
             <div class="drop-info">
@@ -710,8 +3291,10 @@ ADMIN_DASHBOARD_TEMPLATE = """
                 {% endif %}
             </div>
             <div class="drop-actions">
-                {% if drop.audioData %}
-                <button class="play-btn" onclick="playAudio('{{ drop.audioData }}', this)">▶️ Play</button>
+                {% if drop.audioBlobId %}
+                <button class="play-btn" onclick="playAudio('/api/audio/{{ drop.audioBlobId }}', this)">▶️ Play</button>
+                {% else %}
+                <button class="play-btn" onclick="playAudio('/admin/audio/archived/{{ drop._id }}?key={{ key }}', this)">▶️ Play</button>
                 {% endif %}
             </div>
         </div>
@@ -719,7 +3302,16 @@ ADMIN_DASHBOARD_TEMPLATE = """
     </div>
     {% endif %}
     
-    {% if not current_drops and not archived_drops %}
+    <div style="text-align: center; margin-bottom: 20px;">
+        {% if page > 1 %}
+        <a class="export-btn" href="?key={{ key }}">⏮ Newest</a>
+        {% endif %}
+        {% if next_cursor %}
+        <a class="export-btn" href="?key={{ key }}&before={{ next_cursor }}&page={{ page + 1 }}">Older ⏭</a>
+        {% endif %}
+    </div>
+    
+    {% if not current_drops and not archived_count %}
     <div class="section">
         <div class="no-data">
             <h3>No research data available yet</h3>
@@ -764,14 +3356,66 @@ ADMIN_DASHBOARD_TEMPLATE = """
 </html>
 """
 
+# The inline templates are served through a loader, so Jinja compiles each one once and caches it
+app.jinja_loader = DictLoader({
+    'journal.html': JOURNAL_TEMPLATE,
+    'admin_login.html': ADMIN_LOGIN_TEMPLATE,
+    'admin_dashboard.html': ADMIN_DASHBOARD_TEMPLATE
+})
+
+# The journal and login pages take no context, so they are rendered once and served with cache headers
+STATIC_PAGE_MAX_AGE_SECONDS = 600
+
+@functools.lru_cache(maxsize=None)
+def prerendered_page(template_name):
+    """(body, etag) of a context-free template, rendered on first use"""
+    body = render_template(template_name).encode('utf-8')
+    return body, hashlib.sha256(body).hexdigest()[:32]
+
+def static_page_response(template_name):
+    body, etag = prerendered_page(template_name)
+    response = app.response_class(response=body, status=200, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_PAGE_MAX_AGE_SECONDS
+    return response.make_conditional(request)
+
 @app.route('/')
 def index():
-    return render_template_string(JOURNAL_TEMPLATE)
+    return static_page_response('journal.html')
 
 @app.route('/admin')
 def admin_login():
     """Admin login page"""
-    return render_template_string(ADMIN_LOGIN_TEMPLATE)
+    return static_page_response('admin_login.html')
+
+# The dashboard shows archived drops a page at a time, newest first, without their audio
+ADMIN_PAGE_SIZE = 50
+
+def encode_admin_cursor(drop):
+    return base64.urlsafe_b64encode(json.dumps([drop.get('archived_at'), str(drop['_id'])]).encode('utf-8')).decode('ascii')
+
+def admin_page_query(cursor):
+    """Keyset filter for archive records after cursor in (archived_at desc, _id desc) order"""
+    if not cursor:
+        return {}
+    archived_at, object_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    object_id = ObjectId(object_id)
+    if archived_at is None:
+        # Records without an archive time sort last; page through them by _id alone
+        return {'archived_at': None, '_id': {'$lt': object_id}}
+    return {'$or': [
+        {'archived_at': {'$lt': archived_at}},
+        {'archived_at': archived_at, '_id': {'$lt': object_id}},
+        {'archived_at': None}
+    ]}
+
+def archive_comment_total():
+    """Number of comments across the whole archive, counted by the database"""
+    result = list(research_db.sound_drops_archive.aggregate([
+        {'$group': {'_id': None, 'comments': {'$sum': {'$size': {'$ifNull': ['$discussions', []]}}}}}
+    ]))
+    return result[0]['comments'] if result else 0
 
 @app.route('/admin/dashboard')
 def admin_dashboard():
@@ -782,43 +3426,94 @@ def admin_dashboard():
         return "Access denied. Invalid key.", 403
     
     try:
-        # Get ALL data (including expired) from file storage
-        all_data = []
-        if os.path.exists(STORAGE_FILE):
-            with open(STORAGE_FILE, 'r') as f:
-                all_data = json.load(f)
+        # Current data is bounded by the retention period; inline audio is left out and loaded on demand
+        current_data = fallback_load_drops()
+        for drop in current_data:
+            drop['hasAudioData'] = bool(drop.pop('audioData', None))
+        total_comments = sum(len(drop.get('discussions', [])) for drop in current_data)
         
-        # Also try to get archived data from MongoDB if available
+        # One page of the archive, through the (archived_at, _id) index
         archived_data = []
+        archived_count = 0
+        next_cursor = None
         if init_mongodb():
             try:
-                archived_data = list(research_db.sound_drops_archive.find({}).sort('archived_at', -1))
+                collection = research_db.sound_drops_archive
+                archived_data = list(collection.find(
+                    admin_page_query(request.args.get('before')), {'audioData': 0}
+                ).sort([('archived_at', -1), ('_id', -1)]).limit(ADMIN_PAGE_SIZE + 1))
+                if len(archived_data) > ADMIN_PAGE_SIZE:
+                    archived_data = archived_data[:ADMIN_PAGE_SIZE]
+                    next_cursor = encode_admin_cursor(archived_data[-1])
                 # Convert ObjectId to string for template
                 for item in archived_data:
                     item['_id'] = str(item['_id'])
+                archive_stats = stats_snapshot('sound_drops_archive')
+                archived_count = archive_stats['total']
+                total_comments += archive_stats['comments'] if 'comments' in archive_stats else archive_comment_total()
+            except (ValueError, InvalidId):
+                return "Invalid page cursor.", 400
             except Exception as e:
                 print(f"Could not fetch archived data: {e}")
+                record_mongo_error(e)
         
-        # Combine all data for comprehensive view
-        total_drops = len(all_data) + len(archived_data)
-        
-        return render_template_string(ADMIN_DASHBOARD_TEMPLATE, 
-                                    current_drops=all_data,
-                                    archived_drops=archived_data,
-                                    total_count=total_drops)
+        # Streamed, so the browser starts rendering before the last row is produced
+        return app.response_class(stream_template(
+            'admin_dashboard.html',
+            current_drops=current_data,
+            archived_drops=archived_data,
+            archived_count=archived_count,
+            total_count=len(current_data) + archived_count,
+            total_comments=total_comments,
+            next_cursor=next_cursor,
+            page=request.args.get('page', 1, type=int),
+            key=password
+        ), mimetype='text/html')
     
     except Exception as e:
         return f"Error loading dashboard: {str(e)}", 500
 
+@app.route('/admin/audio/<source>/<drop_key>')
+def admin_drop_audio(source, drop_key):
+    """Inline (pre-blob-store) audio of one dashboard row, fetched only when it is played"""
+    if request.args.get('key') != 'research2024':
+        return "Access denied. Invalid key.", 403
+    
+    audio_data = None
+    if source == 'archived':
+        if not init_mongodb():
+            return jsonify({'error': 'Archive not available'}), 503
+        try:
+            doc = research_db.sound_drops_archive.find_one({'_id': ObjectId(drop_key)}, {'audioData': 1})
+        except InvalidId:
+            return jsonify({'error': 'Audio not found'}), 404
+        audio_data = doc.get('audioData') if doc else None
+    elif source == 'current':
+        try:
+            drop_key = int(drop_key)
+        except ValueError:
+            pass
+        reason, drop = fallback_find_duplicate({'id': drop_key})
+        audio_data = drop.get('audioData') if drop else None
+    
+    if not isinstance(audio_data, str):
+        return jsonify({'error': 'Audio not found'}), 404
+    parsed = parse_audio_data_url(audio_data)
+    if parsed is None:
+        return redirect(audio_data)  # Link drops point at external audio
+    mime_type, audio_bytes = parsed
+    return app.response_class(response=audio_bytes, status=200, mimetype=mime_type)
+
 @app.route('/api/status')
 def api_status():
     """Simple status endpoint to check API health and data"""
     try:
-        drops = load_sound_drops()
         return jsonify({
             'status': 'healthy',
-            'drops_count': len(drops),
-            'storage_file': STORAGE_FILE,
+            'drops_count': feed_snapshot()['count'],
+            'storage_file': SQLITE_PATH if FALLBACK_ENGINE == 'sqlite' else FALLBACK_DIR,
+            'fallback_engine': FALLBACK_ENGINE,
+            'mongodb': mongo_breaker_status(),
             'timestamp': datetime.datetime.now().isoformat()
         })
     except Exception as e:
@@ -838,26 +3533,31 @@ def research_status():
     """Research endpoint to check archived data status"""
     try:
         if init_mongodb():
-            # Count archived drops
-            archived_count = research_db.sound_drops_archive.count_documents({})
-            
-            # Get recent archive activity
-            recent_archives = list(research_db.sound_drops_archive.find(
-                {}, 
-                {'id': 1, 'archived_at': 1, 'theme': 1, 'type': 1}
-            ).sort('archived_at', -1).limit(5))
+            # Maintained counters: one document lookup per collection, however large the archive
+            archive_stats = stats_snapshot('sound_drops_archive')
+            recent_archives = archive_stats.pop('recent', None)
+            if recent_archives is None:
+                recent_archives = list(research_db.sound_drops_archive.find(
+                    {},
+                    {'_id': 0, 'id': 1, 'archived_at': 1, 'theme': 1, 'type': 1}
+                ).sort([('archived_at', -1), ('_id', -1)]).limit(STATS_RECENT_ARCHIVES))
+            else:
+                recent_archives.reverse()  # Stored oldest first
             
             return jsonify({
                 'status': 'connected',
-                'archived_drops_count': archived_count,
+                'archived_drops_count': archive_stats['total'],
                 'recent_archives': recent_archives,
+                'stats': {'active': stats_snapshot('active_sounds'), 'archive': archive_stats},
                 'database': MONGODB_DATABASE,
+                'mongodb': mongo_breaker_status(),
                 'timestamp': datetime.datetime.now().isoformat()
             })
         else:
             return jsonify({
                 'status': 'mongodb_connection_failed',
                 'message': 'Could not connect to research database',
+                'mongodb': mongo_breaker_status(),
                 'timestamp': datetime.datetime.now().isoformat()
             }), 500
     except Exception as e:
@@ -868,108 +3568,502 @@ def research_status():
         }), 500
 
 
+# Research exports are streamed: the archive is read through a batched cursor and written out
+# in ~64 KB chunks, so memory use does not grow with the size of the archive
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+EXPORT_CSV_FIELDS = [
+    'id', 'timestamp', 'theme', 'type', 'filename', 'context', 'data_source', 'archived_at', 'comments_count',
+    'comment_id', 'comment_text', 'comment_author', 'comment_timestamp', 'comment_number',
+    'duration_seconds', 'rms_db', 'peak_db', 'spectral_centroid_hz'
+]
+
+# Incremental exports: a watermark is an opaque token over (committed archiveSeq, committed fallback
+# changeSeq). Finished artifacts are cached gzip-compressed on disk, keyed by format and watermarks.
+EXPORT_CACHE_DIR = '/tmp/sound_drops_exports'
+EXPORT_CACHE_TTL_SECONDS = 24 * 60 * 60
+EXPORT_JOB_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_.-]{1,64}$')
+
+def encode_export_watermark(watermark):
+    return base64.urlsafe_b64encode(json.dumps(watermark, sort_keys=True).encode('utf-8')).decode('ascii')
+
+def decode_export_watermark(token):
+    """Watermark dict of a token from a previous export; raises ValueError if it is not one"""
+    try:
+        watermark = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+        if isinstance(watermark.get('archive_seq'), int) and isinstance(watermark.get('change_seq'), int):
+            return watermark
+    except Exception:
+        pass
+    raise ValueError(f"Invalid export watermark: {token}")
+
+def current_export_watermark(since):
+    """Watermark covering every archive write and fallback change that has committed so far
+
+    Both are sequences that only move past a value once its write has committed (see
+    mongo_sequence), so a batch still being archived is picked up by the next export.
+    """
+    archive_seq = since['archive_seq'] if since is not None else 0  # Unchanged while MongoDB is away
+    if init_mongodb():
+        archive_seq = mongo_committed_sequence('archive_records')
+    return {'archive_seq': archive_seq, 'change_seq': fallback_committed_change_seq()}
+
+def export_archive_query(since, until):
+    """Archive records with since < archiveSeq <= until; full exports also get records archived without one"""
+    query = {'archiveSeq': {'$gt': since['archive_seq'] if since is not None else 0, '$lte': until['archive_seq']}}
+    if since is None:
+        query = {'$or': [query, {'archiveSeq': {'$exists': False}}]}
+    return query
+
+def export_current_drops(current_data, since, until):
+    """Fallback drops changed after since (all of them for full exports) and not after until"""
+    low = -1 if since is None else since['change_seq']
+    return [drop for drop in current_data if low < drop.get('changeSeq', 0) <= until['change_seq']]
+
+def iter_export_drops(current_data, archive_query=None):
+    """Current drops, then the matching research archive records read from the cursor in batches"""
+    for drop in current_data:
+        drop['data_source'] = 'current'
+        yield drop
+    
+    if not init_mongodb():
+        return
+    cursor = research_db.sound_drops_archive.find(
+        archive_query or {}, {'audioData': 0, 'fingerprintBands': 0}
+    ).sort('archiveSeq', 1).batch_size(EXPORT_BATCH_SIZE)
+    batch = []
+    for drop in cursor:
+        drop['_id'] = str(drop['_id'])
+        drop['data_source'] = 'archived'
+        batch.append(drop)
+        if len(batch) >= EXPORT_BATCH_SIZE:
+            yield from attach_features(batch)
+            batch = []
+    yield from attach_features(batch)
+
+def attach_features(drops):
+    """Join each archived drop's audio_features document onto it as drop['features'] (one query per batch)"""
+    drop_ids = [drop['id'] for drop in drops if drop.get('id') is not None]
+    features = {}
+    if drop_ids:
+        for doc in research_db.audio_features.find(
+                {'_id': {'$in': drop_ids}, 'status': 'ok'}, {'archive_id': 0, 'status': 0, 'version': 0}):
+            features[doc.pop('_id')] = doc
+    for drop in drops:
+        drop['features'] = features.get(drop.get('id'))
+    return drops
+
+def archive_revision():
+    """Changes whenever existing archive records are edited or extract-features stores new results
+
+    Watermarks only move for new records, so cached exports are keyed by this as well.
+    """
+    revision = research_db.counters.find_one({'_id': 'archive_revision'}, {'seq': 1})
+    checkpoint = research_db.feature_jobs.find_one({'_id': 'archive_features'}, {'updated_at': 1})
+    return [revision['seq'] if revision else 0, checkpoint.get('updated_at') if checkpoint else None]
+
+def bump_archive_revision():
+    """Record an edit of existing archive records, so no cached export from before it is served"""
+    research_db.counters.update_one({'_id': 'archive_revision'}, {'$inc': {'seq': 1}}, upsert=True)
+
+def export_artifact_path(export_format, since, until, revision=None):
+    """Cache file of an export; the same format, watermarks and archive revision always produce the same content"""
+    key = hashlib.sha256(
+        json.dumps([export_format, since, until, revision], sort_keys=True).encode('utf-8')
+    ).hexdigest()[:32]
+    return os.path.join(EXPORT_CACHE_DIR, f"{key}.{'zip' if export_format == 'parquet' else export_format + '.gz'}")
+
+def prune_export_cache():
+    """Delete cached export artifacts older than EXPORT_CACHE_TTL_SECONDS"""
+    cutoff = time.time() - EXPORT_CACHE_TTL_SECONDS
+    for name in os.listdir(EXPORT_CACHE_DIR):
+        path = os.path.join(EXPORT_CACHE_DIR, name)
+        try:
+            if os.stat(path).st_mtime < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass  # Removed by a concurrent prune
+
+def build_parquet_artifact(path, drops):
+    """Write a Parquet export to path via a temporary file, so readers never see a partial artifact
+
+    Parquet files end with their footer, so unlike the text formats this is complete before it is sent.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            # Parquet files are written row group by row group, then stored as one zip
+            with tempfile.TemporaryDirectory(dir=EXPORT_CACHE_DIR) as directory:
+                paths = write_parquet_export(drops, directory)
+                with zipfile.ZipFile(f, 'w', zipfile.ZIP_STORED) as archive:
+                    for parquet_path in paths:
+                        archive.write(parquet_path, os.path.basename(parquet_path))
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+def stream_export_artifact(path, pieces, gzip_response, on_complete):
+    """Send text pieces to the client while gzipping them into the cached artifact at path
+
+    The client gets the gzip stream itself if gzip_response, else the plain text. The artifact
+    only appears at path (and on_complete only runs) once the whole export has been written,
+    so a client that disconnects part-way leaves nothing behind.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix='.tmp')
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in encode_export_stream(pieces):
+                compressed = compressor.compress(chunk)
+                f.write(compressed)
+                data = compressed if gzip_response else chunk
+                if data:
+                    yield data
+            compressed = compressor.flush()
+            f.write(compressed)
+            if gzip_response:
+                yield compressed
+        os.replace(tmp_path, path)
+    except GeneratorExit:
+        os.remove(tmp_path)  # The client went away
+        raise
+    except Exception as e:
+        os.remove(tmp_path)
+        print(f"Export failed while streaming: {e}")
+        record_mongo_error(e)
+        raise
+    on_complete()
+
+def iter_gunzip_file(path):
+    """Decompressed chunks of a gzip artifact, for clients that do not accept gzip"""
+    decompressor = zlib.decompressobj(31)
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(EXPORT_CHUNK_BYTES)
+            if not chunk:
+                break
+            data = decompressor.decompress(chunk)
+            if data:
+                yield data
+    yield decompressor.flush()
+
+def export_csv_rows(drop):
+    """CSV rows of one drop: one per comment, or a single row without comment columns"""
+    base_row = {
+        'id': drop.get('id'),
+        'timestamp': datetime_filter(drop.get('timestamp', 0) / 1000 if drop.get('timestamp') else 0),
+        'theme': drop.get('theme', ''),
+        'type': drop.get('type', ''),
+        'filename': drop.get('filename', ''),
+        'context': drop.get('context', ''),
+        'data_source': drop.get('data_source', ''),
+        'archived_at': drop.get('archived_at', ''),
+        'comments_count': len(drop.get('discussions', []))
+    }
+    features = drop.get('features') or {}
+    base_row.update({
+        'duration_seconds': features.get('duration', ''),
+        'rms_db': features.get('rms_db', ''),
+        'peak_db': features.get('peak_db', ''),
+        'spectral_centroid_hz': features.get('spectral_centroid_hz', '')
+    })
+    if not drop.get('discussions'):
+        return [base_row]
+    
+    rows = []
+    for i, comment in enumerate(drop['discussions']):
+        row = base_row.copy()
+        row.update({
+            'comment_id': comment.get('id', ''),
+            'comment_text': comment.get('text', ''),
+            'comment_author': comment.get('author', ''),
+            'comment_timestamp': datetime_filter(comment.get('timestamp', 0) / 1000 if comment.get('timestamp') else 0),
+            'comment_number': i + 1
+        })
+        rows.append(row)
+    return rows
+
+# Parquet export: a zip of drops.parquet and discussions.parquet (keyed by drop_id), with native types
+PARQUET_ROW_GROUP_SIZE = 10000
+
+def export_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def export_datetime(value):
+    """Millisecond timestamps and ISO strings (both occur in archive records) as datetimes"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return datetime.datetime.fromtimestamp(value / 1000, tz=datetime.timezone.utc)
+    if isinstance(value, str) and value:
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    return None
+
+def parquet_export_schemas():
+    timestamp = pyarrow.timestamp('ms', tz='UTC')
+    drops_schema = pyarrow.schema([
+        ('id', pyarrow.int64()),
+        ('timestamp', timestamp),
+        ('theme', pyarrow.string()),
+        ('type', pyarrow.string()),
+        ('filename', pyarrow.string()),
+        ('context', pyarrow.string()),
+        ('data_source', pyarrow.string()),
+        ('archived_at', pyarrow.timestamp('ms')),  # archive times are naive local ISO strings
+        ('applauds', pyarrow.int32()),
+        ('comments_count', pyarrow.int32()),
+        ('audio_mime_type', pyarrow.string()),
+        ('audio_size', pyarrow.int64()),
+        ('duration_seconds', pyarrow.float64()),
+        ('rms_db', pyarrow.float32()),
+        ('peak_db', pyarrow.float32()),
+        ('spectral_centroid_hz', pyarrow.float32()),
+        ('mel_bands', pyarrow.list_(pyarrow.float32())),
+        ('mfcc', pyarrow.list_(pyarrow.float32()))
+    ])
+    discussions_schema = pyarrow.schema([
+        ('drop_id', pyarrow.int64()),
+        ('comment_id', pyarrow.int64()),
+        ('comment_number', pyarrow.int32()),
+        ('timestamp', timestamp),
+        ('text', pyarrow.string()),
+        ('author', pyarrow.string()),
+        ('edited', pyarrow.bool_()),
+        ('edited_at', timestamp)
+    ])
+    return drops_schema, discussions_schema
+
+def parquet_export_rows(drop):
+    """(drop row, discussion rows) of one drop for the Parquet export"""
+    drop_id = export_int(drop.get('id'))
+    discussions = drop.get('discussions') or []
+    archived_at = export_datetime(drop.get('archived_at'))
+    features = drop.get('features') or {}
+    drop_row = {
+        'id': drop_id,
+        'timestamp': export_datetime(drop.get('timestamp')),
+        'theme': drop.get('theme'),
+        'type': drop.get('type'),
+        'filename': drop.get('filename'),
+        'context': drop.get('context'),
+        'data_source': drop.get('data_source'),
+        'archived_at': archived_at.replace(tzinfo=None) if archived_at else None,
+        'applauds': applaud_count(drop),
+        'comments_count': len(discussions),
+        'audio_mime_type': drop.get('audioMimeType'),
+        'audio_size': export_int(drop.get('audioSize')),
+        'duration_seconds': features.get('duration'),
+        'rms_db': features.get('rms_db'),
+        'peak_db': features.get('peak_db'),
+        'spectral_centroid_hz': features.get('spectral_centroid_hz'),
+        'mel_bands': features.get('mel_bands'),
+        'mfcc': features.get('mfcc')
+    }
+    discussion_rows = [{
+        'drop_id': drop_id,
+        'comment_id': export_int(comment.get('id')),
+        'comment_number': i + 1,
+        'timestamp': export_datetime(comment.get('timestamp')),
+        'text': comment.get('text'),
+        'author': comment.get('author'),
+        'edited': bool(comment.get('edited')),
+        'edited_at': export_datetime(comment.get('editedAt'))
+    } for i, comment in enumerate(discussions)]
+    return drop_row, discussion_rows
+
+def write_parquet_export(drops, directory):
+    """Write drops.parquet and discussions.parquet into directory, one row group per batch"""
+    drops_schema, discussions_schema = parquet_export_schemas()
+    drops_path = os.path.join(directory, 'drops.parquet')
+    discussions_path = os.path.join(directory, 'discussions.parquet')
+    with pyarrow.parquet.ParquetWriter(drops_path, drops_schema, compression='zstd') as drops_writer, \
+            pyarrow.parquet.ParquetWriter(discussions_path, discussions_schema, compression='zstd') as discussions_writer:
+        drop_rows, discussion_rows = [], []
+        for drop in drops:
+            drop_row, comment_rows = parquet_export_rows(drop)
+            drop_rows.append(drop_row)
+            discussion_rows.extend(comment_rows)
+            if len(drop_rows) >= PARQUET_ROW_GROUP_SIZE:
+                drops_writer.write_table(pyarrow.Table.from_pylist(drop_rows, schema=drops_schema))
+                drop_rows = []
+            if len(discussion_rows) >= PARQUET_ROW_GROUP_SIZE:
+                discussions_writer.write_table(pyarrow.Table.from_pylist(discussion_rows, schema=discussions_schema))
+                discussion_rows = []
+        if drop_rows:
+            drops_writer.write_table(pyarrow.Table.from_pylist(drop_rows, schema=drops_schema))
+        if discussion_rows:
+            discussions_writer.write_table(pyarrow.Table.from_pylist(discussion_rows, schema=discussions_schema))
+    return [drops_path, discussions_path]
+
+def iter_export_text(export_format, drops, export_info):
+    """Text pieces of an export in the given format, produced one drop at a time"""
+    if export_format == 'csv':
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=EXPORT_CSV_FIELDS, restval='')
+        writer.writeheader()
+        for drop in drops:
+            writer.writerows(export_csv_rows(drop))
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
+        yield output.getvalue()
+    elif export_format == 'ndjson':
+        for drop in drops:
+            yield json.dumps(drop, default=str) + '\n'
+    else:
+        yield '{"export_info": ' + json.dumps(export_info) + ', "data": [\n'
+        separator = ''
+        for drop in drops:
+            yield separator + json.dumps(drop, default=str)
+            separator = ',\n'
+        yield '\n]}\n'
+
+def encode_export_stream(pieces):
+    """UTF-8 encode text pieces into ~EXPORT_CHUNK_BYTES chunks"""
+    buffer, buffered = [], 0
+    for piece in pieces:
+        data = piece.encode('utf-8')
+        buffer.append(data)
+        buffered += len(data)
+        if buffered < EXPORT_CHUNK_BYTES:
+            continue
+        yield b''.join(buffer)
+        buffer, buffered = [], 0
+    
+    chunk = b''.join(buffer)
+    if chunk:
+        yield chunk
+
 @app.route('/api/research/export')
 def export_research_data():
-    """Export research data in various formats"""
+    """Export research data in various formats (csv, json, ndjson or parquet)
+
+    since=<watermark> limits the export to records archived or changed after a previous export's
+    X-Export-Watermark; job=<name> does the same with a watermark remembered per named job.
+    """
     # Check admin access
     if request.args.get('key') != 'research2024':
         return "Access denied", 403
     
     export_format = request.args.get('format', 'json').lower()
+    if export_format == 'parquet' and pyarrow is None:
+        return jsonify({'error': 'Parquet export requires pyarrow on the server'}), 501
+    if export_format not in EXPORT_MIMETYPES and export_format != 'parquet':
+        export_format = 'json'
+    
+    job_name = request.args.get('job')
+    if job_name is not None and not EXPORT_JOB_NAME_PATTERN.match(job_name):
+        return jsonify({'error': 'Invalid export job name'}), 400
+    if job_name is not None and not init_mongodb():
+        return jsonify({'error': 'Export jobs need MongoDB, which is not available'}), 503
+    
+    try:
+        since = None
+        if job_name is not None:
+            job = research_db.export_jobs.find_one({'_id': job_name})
+            # Jobs last run before archive sequences existed start again with a full export
+            since = job['watermark'] if job and 'archive_seq' in job['watermark'] else None
+        elif request.args.get('since'):
+            since = decode_export_watermark(request.args['since'])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
-        # Get all data (current + archived)
-        all_data = []
+        # The watermark is read first, so every change it covers is in what is read below. Current
+        # data is bounded by the retention period; the archive is only counted up front
+        until = current_export_watermark(since)
+        current_data = export_current_drops(fallback_load_drops(), since, until)
+        archive_query = export_archive_query(since, until)
+        archived_count = 0
+        if init_mongodb():
+            # Full exports use the maintained total; incremental ones count their (indexed) range
+            archive_stats = stats_snapshot('sound_drops_archive') if since is None else {'estimated': True}
+            if archive_stats.get('estimated'):
+                archived_count = research_db.sound_drops_archive.count_documents(archive_query)
+            else:
+                archived_count = archive_stats['total']
         
-        # Get current data
-        if os.path.exists(STORAGE_FILE):
-            with open(STORAGE_FILE, 'r') as f:
-                current_data = json.load(f)
-                for item in current_data:
-                    item['data_source'] = 'current'
-                all_data.extend(current_data)
+        os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+        prune_export_cache()
+        # Fallback deletions move the change sequence (and so the watermark); archive edits the revision
+        artifact = export_artifact_path(export_format, since, until, archive_revision() if init_mongodb() else None)
         
-        # Get archived data from MongoDB
-        if init_mongodb():
-            try:
-                archived_data = list(research_db.sound_drops_archive.find({}, {'audioData': 0}))
-                for item in archived_data:
-                    item['_id'] = str(item['_id'])
-                    item['data_source'] = 'archived'
-                all_data.extend(archived_data)
-            except Exception as e:
-                print(f"Could not fetch archived data: {e}")
+        def record_job():
+            # The job moves on only once its artifact is complete; re-download it with since=
+            if job_name is None:
+                return
+            research_db.export_jobs.update_one({'_id': job_name}, {'$set': {
+                'watermark': until,
+                'previous_watermark': since,
+                'last_run_at': datetime.datetime.now().isoformat(),
+                'last_format': export_format,
+                'last_drop_count': len(current_data) + archived_count
+            }}, upsert=True)
         
-        if export_format == 'csv':
-            # Create CSV export
-            output = io.StringIO()
-            if all_data:
-                # Flatten data for CSV
-                flattened_data = []
-                for drop in all_data:
-                    base_row = {
-                        'id': drop.get('id'),
-                        'timestamp': datetime_filter(drop.get('timestamp', 0) / 1000 if drop.get('timestamp') else 0),
-                        'theme': drop.get('theme', ''),
-                        'type': drop.get('type', ''),
-                        'filename': drop.get('filename', ''),
-                        'context': drop.get('context', ''),
-                        'data_source': drop.get('data_source', ''),
-                        'archived_at': drop.get('archived_at', ''),
-                        'comments_count': len(drop.get('discussions', []))
-                    }
-                    
-                    # Add each comment as a separate row
-                    if drop.get('discussions'):
-                        for i, comment in enumerate(drop.get('discussions', [])):
-                            row = base_row.copy()
-                            row.update({
-                                'comment_id': comment.get('id', ''),
-                                'comment_text': comment.get('text', ''),
-                                'comment_author': comment.get('author', ''),
-                                'comment_timestamp': datetime_filter(comment.get('timestamp', 0) / 1000 if comment.get('timestamp') else 0),
-                                'comment_number': i + 1
-                            })
-                            flattened_data.append(row)
-                    else:
-                        # Add row without comments
-                        flattened_data.append(base_row)
-                
-                if flattened_data:
-                    writer = csv.DictWriter(output, fieldnames=flattened_data[0].keys())
-                    writer.writeheader()
-                    writer.writerows(flattened_data)
-            
-            response = app.response_class(
-                response=output.getvalue(),
-                status=200,
-                mimetype='text/csv'
+        export_stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M")
+        accepts_gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+        if export_format == 'parquet':
+            if os.path.exists(artifact):
+                print(f"Export: Serving cached artifact {os.path.basename(artifact)}")
+            else:
+                build_parquet_artifact(artifact, iter_export_drops(current_data, archive_query))
+            record_job()
+            response = send_file(
+                artifact, mimetype='application/zip', as_attachment=True,
+                download_name=f'sounddrop_research_data_{export_stamp}_parquet.zip'
             )
-            response.headers['Content-Disposition'] = f'attachment; filename=sounddrop_research_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M")}.csv'
-            return response
-        
+        elif os.path.exists(artifact):
+            print(f"Export: Serving cached artifact {os.path.basename(artifact)}")
+            record_job()
+            if accepts_gzip:
+                # Clients that accept gzip (browsers, curl --compressed) get the cached bytes as-is
+                response = send_file(
+                    artifact, mimetype=EXPORT_MIMETYPES[export_format], as_attachment=True,
+                    download_name=f'sounddrop_research_data_{export_stamp}.{export_format}'
+                )
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = app.response_class(
+                    response=iter_gunzip_file(artifact),
+                    status=200,
+                    mimetype=EXPORT_MIMETYPES[export_format]
+                )
+                response.headers['Content-Disposition'] = f'attachment; filename=sounddrop_research_data_{export_stamp}.{export_format}'
         else:
-            # JSON export
-            export_data = {
-                'export_info': {
-                    'timestamp': datetime.datetime.now().isoformat(),
-                    'total_drops': len(all_data),
-                    'current_drops': len([d for d in all_data if d.get('data_source') == 'current']),
-                    'archived_drops': len([d for d in all_data if d.get('data_source') == 'archived']),
-                    'format': 'json'
-                },
-                'data': all_data
+            # Streamed to the client while the artifact is written, so the first bytes go out right away
+            export_info = {
+                'timestamp': datetime.datetime.now().isoformat(),
+                'total_drops': len(current_data) + archived_count,
+                'current_drops': len(current_data),
+                'archived_drops': archived_count,
+                'format': export_format,
+                'since': encode_export_watermark(since) if since is not None else None,
+                'watermark': encode_export_watermark(until)
             }
-            
+            pieces = iter_export_text(export_format, iter_export_drops(current_data, archive_query), export_info)
             response = app.response_class(
-                response=json.dumps(export_data, indent=2),
+                response=stream_export_artifact(artifact, pieces, accepts_gzip, record_job),
                 status=200,
-                mimetype='application/json'
+                mimetype=EXPORT_MIMETYPES[export_format]
             )
-            response.headers['Content-Disposition'] = f'attachment; filename=sounddrop_research_data_{datetime.datetime.now().strftime("%Y%m%d_%H%M")}.json'
-            return response
+            response.headers['Content-Disposition'] = f'attachment; filename=sounddrop_research_data_{export_stamp}.{export_format}'
+            if accepts_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Vary'] = 'Accept-Encoding'
+        if since is not None:
+            response.headers['X-Export-Since'] = encode_export_watermark(since)
+        response.headers['X-Export-Watermark'] = encode_export_watermark(until)
+        return response
             
     except Exception as e:
+        print(f"Export failed: {e}")
+        record_mongo_error(e)
         return jsonify({
             'status': 'error',
             'error': str(e)
@@ -1020,8 +4114,105 @@ def get_theme():
 
 @app.route('/api/sound-drops', methods=['GET'])
 def get_sound_drops():
-    drops = load_sound_drops()
-    return jsonify(drops)
+    # ?since=<cursor> returns only drops changed after the cursor plus ids deleted since;
+    # without it the whole feed is returned. Either way X-Feed-Cursor is the cursor to send next
+    # (a change can arrive in two consecutive deltas, so clients apply drops and deletions by id).
+    # Cursors look like 'm:5000'; a delta with reset: true holds the full feed and replaces the client's view.
+    since = request.args.get('since')
+    if since is not None:
+        cursor = parse_change_cursor(since)
+        if cursor is None:
+            return jsonify({'error': 'since must be a change cursor from X-Feed-Cursor'}), 400
+        feed = feed_changes_snapshot(*cursor)
+    else:
+        feed = feed_snapshot()
+    
+    # Pollers send back the ETag and get a bodiless 304 until the feed changes
+    response = app.response_class(response=feed['body'], status=200, mimetype='application/json')
+    response.set_etag(feed['etag'])
+    response.headers['X-Feed-Cursor'] = feed['cursor']
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def audio_response(mime_type, size, last_modified, audio_file, etag, immutable):
+    """Stream audio with Range (206) and If-None-Match / If-Modified-Since (304) support"""
+    response = app.response_class(
+        wrap_file(request.environ, audio_file, AUDIO_CHUNK_BYTES), mimetype=mime_type, direct_passthrough=True
+    )
+    response.content_length = size
+    response.last_modified = last_modified
+    response.set_etag(etag)
+    if immutable:
+        response.cache_control.public = True
+        response.cache_control.max_age = AUDIO_CACHE_MAX_AGE_SECONDS
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    # Seeks only read the requested byte range from the file or GridFS chunks
+    return response.make_conditional(request, accept_ranges=True, complete_length=size)
+
+def blob_audio_response(blob_id):
+    blob = open_audio_blob(blob_id)
+    if blob is None:
+        return jsonify({'error': 'Audio not found'}), 404
+    mime_type, size, last_modified, audio_file = blob
+    # The blob id is the SHA-256 of the bytes, so it is a strong validator that never goes stale
+    return audio_response(mime_type, size, last_modified, audio_file, blob_id, immutable=True)
+
+@app.route('/api/audio/<blob_id>', methods=['GET'])
+def get_audio(blob_id):
+    """Serve the raw bytes of a content-addressed audio blob"""
+    return blob_audio_response(blob_id)
+
+def find_sound_drop(drop_id):
+    reason, drop = find_duplicate_drop({'id': drop_id})
+    return drop
+
+@app.route('/api/sound-drops/<int:drop_id>/audio', methods=['GET'])
+def get_sound_drop_audio(drop_id):
+    """Serve the audio of one sound drop, seekable with Range requests"""
+    drop = find_sound_drop(drop_id)
+    if drop is None:
+        return jsonify({'error': 'Sound drop not found'}), 404
+    if drop.get('audioBlobId'):
+        return blob_audio_response(drop['audioBlobId'])
+    
+    audio_data = drop.get('audioData')
+    if not isinstance(audio_data, str):
+        return jsonify({'error': 'Audio not found'}), 404
+    parsed = parse_audio_data_url(audio_data)
+    if parsed is None:
+        return redirect(audio_data)  # Link drops point at external audio
+    # Inline audio that has not been moved to the blob store yet
+    mime_type, audio_bytes = parsed
+    etag = hashlib.sha256(audio_bytes).hexdigest()
+    last_modified = datetime.datetime.fromtimestamp(drop['timestamp'] / 1000) if drop.get('timestamp') else None
+    return audio_response(mime_type, len(audio_bytes), last_modified, io.BytesIO(audio_bytes), etag, immutable=False)
+
+@app.route('/api/sound-drops/<int:drop_id>/waveform', methods=['GET'])
+def get_sound_drop_waveform(drop_id):
+    """Peak and RMS levels of a drop's audio in ?buckets=N spans, for drawing waveforms without the audio"""
+    buckets = min(max(request.args.get('buckets', WAVEFORM_DEFAULT_BUCKETS, type=int), 1), WAVEFORM_LEVEL_BUCKETS)
+    drop = find_sound_drop(drop_id)
+    if drop is None:
+        return jsonify({'error': 'Sound drop not found'}), 404
+    summary = drop_waveform(drop)
+    if summary is None:
+        return jsonify({'error': 'Waveform not available for this audio'}), 404
+    
+    digest, waveform = summary
+    peak, rms = reduce_waveform(waveform['peak'], waveform['rms'], buckets)
+    response = jsonify({
+        'id': drop_id,
+        'duration': round(waveform['duration'], 3),
+        'buckets': len(peak),
+        'peaks': peak.astype(np.float64).round(4).tolist(),
+        'rms': rms.astype(np.float64).round(4).tolist()
+    })
+    # The levels only change if the drop's audio is replaced (by a background transcode)
+    response.set_etag(f'{digest}-{buckets}')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/api/admin/sound-drops', methods=['GET'])
 def get_admin_sound_drops():
@@ -1033,10 +4224,7 @@ def get_admin_sound_drops():
     
     try:
         # Load data from file storage (active data)
-        file_data = []
-        if os.path.exists(STORAGE_FILE):
-            with open(STORAGE_FILE, 'r') as f:
-                file_data = json.load(f)
+        file_data = fallback_load_drops()
         
         # Also load recent data from MongoDB archive (last 7 days)
         archived_data = []
@@ -1087,6 +4275,48 @@ def get_admin_sound_drops():
         print(f"Error in admin sound drops API: {e}")
         return jsonify({'error': str(e)}), 500
 
+def duplicate_drop_response(drop):
+    """JSON response describing an existing duplicate of drop, or None if there is none"""
+    reason, existing_drop = find_duplicate_drop(drop)
+    if reason == 'id':
+        print(f"⚠️ Duplicate sound detected - ID {drop['id']} already exists")
+        return jsonify({
+            'message': 'Sound already exists (same ID)',
+            'drop': public_drop(existing_drop)
+        })
+    if reason == 'content':
+        print(f"⚠️ Duplicate sound detected - same filename and audio data")
+        return jsonify({
+            'message': 'Sound already exists (same content)',
+            'drop': public_drop(existing_drop)
+        })
+    return None
+
+def near_duplicate_response(drop):
+    """Apply SOUNDDROP_NEAR_DUPLICATES to a new drop: a JSON response when it is rejected, otherwise None
+    (flagged drops get nearDuplicateOf and nearDuplicateDistance)"""
+    if NEAR_DUPLICATES == 'off' or not drop.get('fingerprint'):
+        return None
+    existing_drop, distance = find_near_duplicate(drop['fingerprint'], drop['fingerprintBands'], exclude_id=drop['id'])
+    if existing_drop is None:
+        return None
+    if NEAR_DUPLICATES == 'reject':
+        print(f"⚠️ Near-duplicate sound rejected - matches {existing_drop['id']} (distance {distance})")
+        # The audio was stored before it could be fingerprinted; the archiver sweeps it unless reused
+        for key in ('audioBlobId', 'originalBlobId'):
+            if drop.get(key):
+                try:
+                    mark_orphaned_blob(drop[key])
+                except Exception as e:
+                    print(f"Could not remove the audio of a rejected near-duplicate: {e}")
+        return jsonify({
+            'message': 'Sound already exists (near-duplicate audio)',
+            'drop': public_drop(existing_drop)
+        })
+    drop['nearDuplicateOf'] = existing_drop['id']
+    drop['nearDuplicateDistance'] = distance
+    return None
+
 @app.route('/api/sound-drops', methods=['POST'])
 def create_sound_drop():
     try:
@@ -1123,41 +4353,50 @@ def create_sound_drop():
             'discussions': [],
             'applauds': 0  # Initialize as number for counting
         }
+        if data.get('source'):
+            drop['source'] = data['source']  # 'journal' for the voice-journal recorder
         
-        # Load existing drops and check for duplicates
-        drops = load_sound_drops()
-        
-        # Enhanced duplicate prevention - check by ID, filename, and audio data
-        for existing_drop in drops:
-            # Check by ID
-            if existing_drop['id'] == drop['id']:
-                print(f"⚠️ Duplicate sound detected - ID {drop['id']} already exists")
-                return jsonify({
-                    'message': 'Sound already exists (same ID)',
-                    'drop': existing_drop
-                })
-            
-            # Check by filename (for same recording synced multiple times)
-            if (existing_drop.get('filename') == drop['filename'] and 
-                existing_drop.get('audioData') == drop['audioData']):
-                print(f"⚠️ Duplicate sound detected - same filename and audio data")
-                return jsonify({
-                    'message': 'Sound already exists (same content)',
-                    'drop': existing_drop
-                })
+        # Duplicate prevention comes before any ingest work: an indexed lookup by ID (the same drop
+        # synced again), then by filename and the digest of the decoded audio (the same recording)
+        parsed = None
+        duplicate_response = duplicate_drop_response(drop)
+        if duplicate_response is None:
+            parsed = parse_audio_data_url(drop['audioData'])
+            if parsed is not None:
+                audio_stream = io.BytesIO(parsed[1])
+                drop['contentHash'] = stream_digest(audio_stream)
+            elif isinstance(drop['audioData'], str):
+                # Links are kept as-is and hashed by their text
+                drop['contentHash'] = hashlib.sha256(drop['audioData'].encode('utf-8')).hexdigest()
+            duplicate_response = duplicate_drop_response(drop)
+        if duplicate_response is not None:
+            return duplicate_response
         
-        # Add new drop
-        drops.insert(0, drop)
+        # Store the audio bytes in the blob store (after the ingest stages); the drop keeps only a reference
+        if parsed is not None:
+            drop.update(ingest_audio(audio_stream, parsed[0], drop['contentHash'], journal_recording(drop)))
+            del drop['audioData']
+        duplicate_response = near_duplicate_response(drop)
+        if duplicate_response is not None:
+            return duplicate_response
         
-        # Save back to storage
-        if save_sound_drops(drops):
+        # Insert only the new drop
+        try:
+            inserted = insert_sound_drop(drop)
+        except (DuplicateKeyError, sqlite3.IntegrityError):
+            # A concurrent sync inserted the same drop between the check and the insert
+            return duplicate_drop_response(drop)
+        if inserted:
+            schedule_transcode(drop)
             return jsonify({
                 'message': 'Sound drop saved successfully!',
-                'drop': drop
+                'drop': public_drop(drop)
             })
         else:
             return jsonify({'error': 'Failed to save sound drop'}), 500
         
+    except RequestEntityTooLarge:
+        raise  # Answered by the 413 handler
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -1170,44 +4409,18 @@ def toggle_applaud(drop_id):
         # Rate limiting: Get client IP for basic protection
         client_ip = request.environ.get('HTTP_X_FORWARDED_FOR', request.environ.get('REMOTE_ADDR', 'unknown'))
         
-        # Load existing drops
-        drops = load_sound_drops()
-        
-        # Find the target drop
-        target_drop = None
-        for drop in drops:
-            if drop['id'] == drop_id:
-                target_drop = drop
-                break
+        # Single atomic update, capped for research integrity
+        status, applauds = update_applauds(drop_id, applaud)
         
-        if not target_drop:
+        if status == 'not_found':
             return jsonify({'error': 'Sound drop not found'}), 404
+        if status == 'limit':
+            return jsonify({'error': f'This sound has reached the maximum applaud limit ({MAX_APPLAUDS}). Thank you for your enthusiasm!'}), 400
         
-        # Initialize applauds if not exists or fix array format
-        if 'applauds' not in target_drop:
-            target_drop['applauds'] = 0
-        elif isinstance(target_drop['applauds'], list):
-            # Fix old array format - convert to count
-            target_drop['applauds'] = len(target_drop['applauds'])
-        
-        # Reasonable applaud limits for research integrity
-        if applaud and target_drop['applauds'] >= 100:
-            return jsonify({'error': 'This sound has reached the maximum applaud limit (100). Thank you for your enthusiasm!'}), 400
-        
-        # Update applaud count
-        if applaud:
-            target_drop['applauds'] += 1
-        else:
-            target_drop['applauds'] = max(0, target_drop['applauds'] - 1)
-        
-        # Save back to storage
-        if save_sound_drops(drops):
-            return jsonify({
-                'message': 'Applaud updated successfully!',
-                'applauds': target_drop['applauds']
-            })
-        else:
-            return jsonify({'error': 'Failed to save applaud'}), 500
+        return jsonify({
+            'message': 'Applaud updated successfully!',
+            'applauds': applauds
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1220,13 +4433,6 @@ def add_discussion(drop_id):
         if not data or 'text' not in data:
             return jsonify({'error': 'No comment text provided'}), 400
         
-        # Load drops and find the specific one
-        drops = load_sound_drops()
-        drop_index = next((i for i, d in enumerate(drops) if d['id'] == drop_id), None)
-        
-        if drop_index is None:
-            return jsonify({'error': 'Sound drop not found'}), 404
-        
         # Add comment
         comment = {
             'id': int(datetime.datetime.now().timestamp() * 1000),
@@ -1235,16 +4441,13 @@ def add_discussion(drop_id):
             'author': data.get('author', 'A Group Member')
         }
         
-        drops[drop_index]['discussions'].append(comment)
+        if not push_discussion(drop_id, comment):
+            return jsonify({'error': 'Sound drop not found'}), 404
         
-        # Save back to storage
-        if save_sound_drops(drops):
-            return jsonify({
-                'message': 'Comment added successfully!',
-                'comment': comment
-            })
-        else:
-            return jsonify({'error': 'Failed to save comment'}), 500
+        return jsonify({
+            'message': 'Comment added successfully!',
+            'comment': comment
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1256,27 +4459,17 @@ def edit_comment(drop_id, comment_id):
         if not data or 'text' not in data:
             return jsonify({'error': 'No comment text provided'}), 400
         
-        drops = load_sound_drops()
-        drop_index = next((i for i, d in enumerate(drops) if d['id'] == drop_id), None)
-        if drop_index is None:
+        # Update comment in place
+        status, comment = update_discussion(drop_id, comment_id, data['text'])
+        if status == 'not_found':
             return jsonify({'error': 'Sound drop not found'}), 404
-        
-        comment_index = next((i for i, c in enumerate(drops[drop_index]['discussions']) if c['id'] == comment_id), None)
-        if comment_index is None:
+        if status == 'comment_not_found':
             return jsonify({'error': 'Comment not found'}), 404
         
-        # Update comment
-        drops[drop_index]['discussions'][comment_index]['text'] = data['text']
-        drops[drop_index]['discussions'][comment_index]['edited'] = True
-        drops[drop_index]['discussions'][comment_index]['editedAt'] = int(datetime.datetime.now().timestamp() * 1000)
-        
-        if save_sound_drops(drops):
-            return jsonify({
-                'message': 'Comment updated successfully!',
-                'comment': drops[drop_index]['discussions'][comment_index]
-            })
-        else:
-            return jsonify({'error': 'Failed to update comment'}), 500
+        return jsonify({
+            'message': 'Comment updated successfully!',
+            'comment': comment
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1284,22 +4477,14 @@ def edit_comment(drop_id, comment_id):
 @app.route('/api/sound-drops/<int:drop_id>/discussion/<int:comment_id>', methods=['DELETE'])
 def delete_comment(drop_id, comment_id):
     try:
-        drops = load_sound_drops()
-        drop_index = next((i for i, d in enumerate(drops) if d['id'] == drop_id), None)
-        if drop_index is None:
+        # Remove comment
+        status = pull_discussion(drop_id, comment_id)
+        if status == 'not_found':
             return jsonify({'error': 'Sound drop not found'}), 404
-        
-        comment_index = next((i for i, c in enumerate(drops[drop_index]['discussions']) if c['id'] == comment_id), None)
-        if comment_index is None:
+        if status == 'comment_not_found':
             return jsonify({'error': 'Comment not found'}), 404
         
-        # Remove comment
-        drops[drop_index]['discussions'].pop(comment_index)
-        
-        if save_sound_drops(drops):
-            return jsonify({'message': 'Comment deleted successfully!'})
-        else:
-            return jsonify({'error': 'Failed to delete comment'}), 500
+        return jsonify({'message': 'Comment deleted successfully!'})
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1313,64 +4498,69 @@ def delete_sound_drop(drop_id):
         if not auth_header.startswith('Bearer ') or auth_header.split(' ')[1] != 'research2024':
             return jsonify({'error': 'Unauthorized. Admin access required.'}), 401
         
-        # Convert drop_id to appropriate type (handle both string and int IDs)
-        try:
-            drop_id_int = int(drop_id)
-        except ValueError:
-            drop_id_int = None
-        
-        print(f"🗑️ DELETE REQUEST: Looking for drop with ID '{drop_id}' (int: {drop_id_int})")
-        
-        # Load existing drops from both sources
-        drops = load_sound_drops()
-        print(f"📊 Found {len(drops)} total drops to search")
-        
-        # Debug: Print all drop IDs
-        for i, drop in enumerate(drops):
-            print(f"  Drop {i}: ID={drop.get('id')} (type: {type(drop.get('id'))})")
-        
-        # Find and remove the target drop (check both string and int versions)
-        original_count = len(drops)
-        drops = [drop for drop in drops if str(drop['id']) != str(drop_id) and drop['id'] != drop_id_int]
+        print(f"🗑️ DELETE REQUEST: Looking for drop with ID '{drop_id}'")
         
-        if len(drops) == original_count:
-            print(f"❌ Sound drop with ID '{drop_id}' not found in {original_count} drops")
+        # Delete the single document (string and int IDs are both matched)
+        if not remove_sound_drop(drop_id):
+            print(f"❌ Sound drop with ID '{drop_id}' not found")
             return jsonify({'error': f'Sound drop not found. ID: {drop_id}'}), 404
         
-        # Save updated drops to file storage
-        file_save_success = save_sound_drops(drops)
-        
-        # Also try to delete from MongoDB if available
-        mongo_delete_success = False
-        if USE_MONGODB_PRIMARY and mongo_db is not None:
-            try:
-                # Try to delete from MongoDB using both string and ObjectId
-                mongo_result = mongo_db.active_sounds.delete_one({
-                    '$or': [
-                        {'id': drop_id},
-                        {'id': drop_id_int},
-                        {'id': str(drop_id)}
-                    ]
-                })
-                mongo_delete_success = mongo_result.deleted_count > 0
-                print(f"🗄️ MongoDB delete result: {mongo_result.deleted_count} documents deleted")
-            except Exception as mongo_error:
-                print(f"MongoDB delete failed: {mongo_error}")
-        
-        if file_save_success:
-            print(f"✅ Successfully deleted drop {drop_id}. Remaining: {len(drops)}")
-            return jsonify({
-                'message': f'Sound drop {drop_id} deleted successfully',
-                'deleted_id': drop_id,
-                'remaining_drops': len(drops),
-                'mongo_deleted': mongo_delete_success
-            })
-        else:
-            return jsonify({'error': 'Failed to save changes after deletion'}), 500
+        remaining = feed_snapshot()['count']
+        print(f"✅ Successfully deleted drop {drop_id}. Remaining: {remaining}")
+        return jsonify({
+            'message': f'Sound drop {drop_id} deleted successfully',
+            'deleted_id': drop_id,
+            'remaining_drops': remaining
+        })
         
     except Exception as e:
         return jsonify({'error': f'Delete operation failed: {str(e)}'}), 500
 
+@app.errorhandler(413)
+def request_too_large(error):
+    """Reject oversized uploads as JSON; werkzeug stops reading at MAX_CONTENT_LENGTH"""
+    return jsonify({'error': f'Upload too large (limit is {MAX_UPLOAD_BYTES} bytes)'}), 413
+
+def save_uploaded_drop(stream, mime_type, filename, audio_type, context, source=None):
+    """Ingest an upload read from a seekable stream and create its sound drop (or report the drop
+    the same file already created)"""
+    current_theme = get_current_theme()
+    drop = {
+        'id': int(datetime.datetime.now().timestamp() * 1000),
+        'timestamp': int(datetime.datetime.now().timestamp() * 1000),
+        'theme': current_theme['title'],
+        'contentHash': stream_digest(stream),
+        'context': context,
+        'type': audio_type,
+        'filename': filename,
+        'discussions': []
+    }
+    if source:
+        drop['source'] = source  # 'journal' for the voice-journal recorder
+    
+    # Re-uploading the same file returns the drop it already created, before any ingest work
+    duplicate_response = duplicate_drop_response(drop)
+    if duplicate_response is not None:
+        return duplicate_response
+    drop.update(ingest_audio(stream, mime_type, drop['contentHash'], journal_recording(drop)))
+    duplicate_response = near_duplicate_response(drop)
+    if duplicate_response is not None:
+        return duplicate_response
+    
+    # Insert only the new drop
+    try:
+        inserted = insert_sound_drop(drop)
+    except (DuplicateKeyError, sqlite3.IntegrityError):
+        return duplicate_drop_response(drop)
+    if inserted:
+        schedule_transcode(drop)
+        return jsonify({
+            'message': f'Audio {audio_type} successfully!',
+            'drop': public_drop(drop)
+        })
+    else:
+        return jsonify({'error': 'Failed to save audio drop'}), 500
+
 @app.route('/api/upload-audio', methods=['POST'])
 def upload_audio():
     try:
@@ -1383,38 +4573,393 @@ def upload_audio():
         if audio_file.filename == '':
             return jsonify({'error': 'No file selected'}), 400
         
-        # Convert audio file to base64 for storage
-        audio_data = base64.b64encode(audio_file.read()).decode('utf-8')
-        data_url = f"data:audio/wav;base64,{audio_data}"
+        # Stream the audio into the blob store (transcoded if it is PCM WAV); werkzeug has already
+        # spooled large uploads to a temporary file, so the file is never held in memory as a whole
+        mime_type = audio_file.mimetype or 'audio/wav'
+        return save_uploaded_drop(
+            audio_file.stream, mime_type, audio_file.filename, audio_type, request.form.get('context', ''),
+            request.form.get('source')
+        )
         
-        # Create sound drop
-        current_theme = get_current_theme()
-        drop = {
-            'id': int(datetime.datetime.now().timestamp() * 1000),
-            'timestamp': int(datetime.datetime.now().timestamp() * 1000),
-            'theme': current_theme['title'],
-            'audioData': data_url,
-            'context': request.form.get('context', ''),
-            'type': audio_type,
-            'filename': audio_file.filename,
-            'discussions': []
-        }
+    except RequestEntityTooLarge:
+        raise  # Answered by the 413 handler
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@contextlib.contextmanager
+def locked_upload_session(upload_id):
+    """Exclusive lock over an upload session; yields (directory, meta), or (None, None) if it is unknown or expired"""
+    directory = os.path.join(UPLOAD_SESSION_DIR, upload_id)
+    if not UPLOAD_ID_PATTERN.match(upload_id) or not os.path.isdir(directory):
+        yield None, None
+        return
+    with open(os.path.join(directory, 'lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            meta = read_upload_meta(directory)
+            if meta is None or meta['expires_at'] < time.time():
+                yield None, None
+            else:
+                yield directory, meta
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def read_upload_meta(directory):
+    try:
+        with open(os.path.join(directory, 'meta.json'), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None  # Removed by expiry or finalize, or never fully created
+
+def write_upload_meta(directory, meta):
+    """Save session state with a fresh expiry (atomically, so a crash keeps the previous state)"""
+    meta['expires_at'] = time.time() + UPLOAD_SESSION_TTL_SECONDS
+    meta_path = os.path.join(directory, 'meta.json')
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def upload_session_status(upload_id, meta):
+    return {
+        'uploadId': upload_id,
+        'offset': meta['offset'],
+        'size': meta['size'],
+        'expiresAt': datetime.datetime.fromtimestamp(meta['expires_at']).isoformat()
+    }
+
+def expire_upload_sessions():
+    """Remove sessions that were not touched within UPLOAD_SESSION_TTL_SECONDS"""
+    if not os.path.isdir(UPLOAD_SESSION_DIR):
+        return 0
+    expired = 0
+    for upload_id in os.listdir(UPLOAD_SESSION_DIR):
+        directory = os.path.join(UPLOAD_SESSION_DIR, upload_id)
+        meta = read_upload_meta(directory)
+        expires_at = meta['expires_at'] if meta else os.stat(directory).st_mtime + UPLOAD_SESSION_TTL_SECONDS
+        if expires_at < time.time():
+            shutil.rmtree(directory, ignore_errors=True)
+            expired += 1
+    if expired:
+        print(f"Uploads: Removed {expired} expired upload sessions")
+    return expired
+
+@app.route('/api/uploads', methods=['POST'])
+def create_upload_session():
+    """Start a resumable upload: {filename, type?, context?, source?, mimeType?, size?} -> upload id and offset 0"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('filename'):
+        return jsonify({'error': 'filename is required'}), 400
+    size = data.get('size')
+    if size is not None and (not isinstance(size, int) or size <= 0):
+        return jsonify({'error': 'size must be a positive number of bytes'}), 400
+    if size is not None and size > MAX_RECORDING_BYTES:
+        return jsonify({'error': f'Recording too large (limit is {MAX_RECORDING_BYTES} bytes)'}), 413
+    
+    expire_upload_sessions()
+    upload_id = uuid.uuid4().hex
+    directory = os.path.join(UPLOAD_SESSION_DIR, upload_id)
+    os.makedirs(directory)
+    open(os.path.join(directory, 'data'), 'wb').close()
+    meta = {
+        'filename': data['filename'],
+        'type': data.get('type', 'uploaded'),
+        'context': data.get('context', ''),
+        'mime_type': data.get('mimeType', 'audio/wav'),
+        'source': data.get('source'),
+        'size': size,
+        'offset': 0
+    }
+    write_upload_meta(directory, meta)
+    print(f"Uploads: Started session {upload_id} for {meta['filename']}")
+    response = jsonify(upload_session_status(upload_id, meta))
+    response.headers['Location'] = f'/api/uploads/{upload_id}'
+    return response, 201
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_upload_session(upload_id):
+    """Progress of an upload session; clients resume by sending the chunk starting at offset"""
+    with locked_upload_session(upload_id) as (directory, meta):
+        if meta is None:
+            return jsonify({'error': 'Upload session not found or expired'}), 404
+        return jsonify(upload_session_status(upload_id, meta))
+
+@app.route('/api/uploads/<upload_id>', methods=['PUT'])
+def put_upload_chunk(upload_id):
+    """Append the request body at ?offset= (or the Upload-Offset header), which must equal the session offset"""
+    offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+    try:
+        offset = int(offset)
+    except (TypeError, ValueError):
+        return jsonify({'error': 'offset is required'}), 400
+    
+    with locked_upload_session(upload_id) as (directory, meta):
+        if meta is None:
+            return jsonify({'error': 'Upload session not found or expired'}), 404
+        if offset != meta['offset']:
+            # Retried or out-of-order chunk: tell the client where to resume
+            return jsonify({**upload_session_status(upload_id, meta), 'error': 'Offset mismatch'}), 409
         
-        # Load existing drops and add new one
-        drops = load_sound_drops()
-        drops.insert(0, drop)
+        limit = min(meta['size'] or MAX_RECORDING_BYTES, MAX_RECORDING_BYTES)
+        written = 0
+        too_large = False
+        with open(os.path.join(directory, 'data'), 'r+b') as f:
+            f.seek(offset)
+            f.truncate()  # Drop bytes of an interrupted chunk that were never acknowledged
+            try:
+                for chunk in read_chunks(request.stream):
+                    if offset + written + len(chunk) > limit:
+                        too_large = True
+                        break
+                    f.write(chunk)
+                    written += len(chunk)
+            except ClientDisconnected:
+                print(f"Uploads: Client disconnected from {upload_id} after {written} bytes")
+            finally:
+                # Whatever arrived is kept, so a broken connection resumes where it stopped
+                f.flush()
+                os.fsync(f.fileno())
+                f.truncate(offset + written)
+                meta['offset'] = offset + written
+                write_upload_meta(directory, meta)
         
-        # Save back to storage
-        if save_sound_drops(drops):
-            return jsonify({
-                'message': f'Audio {audio_type} successfully!',
-                'drop': drop
-            })
-        else:
-            return jsonify({'error': 'Failed to save audio drop'}), 500
+        if too_large:
+            return jsonify({**upload_session_status(upload_id, meta), 'error': f'Recording exceeds {limit} bytes'}), 413
+        return jsonify(upload_session_status(upload_id, meta))
+
+@app.route('/api/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload_session(upload_id):
+    """Move a finished session's file into the blob store and create its sound drop"""
+    with locked_upload_session(upload_id) as (directory, meta):
+        if meta is None:
+            return jsonify({'error': 'Upload session not found or expired'}), 404
+        if meta['offset'] == 0 or (meta['size'] is not None and meta['offset'] != meta['size']):
+            return jsonify({**upload_session_status(upload_id, meta), 'error': 'Upload is incomplete'}), 409
         
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        # The chunks were appended to one file, which is streamed into the blob store
+        try:
+            with open(os.path.join(directory, 'data'), 'rb') as f:
+                response = app.make_response(
+                    save_uploaded_drop(f, meta['mime_type'], meta['filename'], meta['type'], meta['context'],
+                                       meta.get('source'))
+                )
+        except Exception as e:
+            print(f"Uploads: Completing session {upload_id} failed: {e}")
+            return jsonify({**upload_session_status(upload_id, meta), 'error': str(e)}), 500
+        # The session is only removed once its drop is saved; after a failure complete can be retried
+        if response.status_code >= 500:
+            return response
+        shutil.rmtree(directory)
+    
+    print(f"Uploads: Completed session {upload_id} ({meta['offset']} bytes)")
+    return response
+
+@app.cli.command('archive-expired')
+@click.option('--batch-size', default=ARCHIVE_BATCH_SIZE, show_default=True, help='Drops per archive batch')
+def archive_expired_command(batch_size):
+    """Move drops older than the retention period into the research archive"""
+    archive_expired_drops(batch_size=batch_size)
+
+@app.cli.command('explain-queries')
+def explain_queries():
+    """Print the winning query plan of each hot query and whether it uses an index"""
+    if not init_mongodb():
+        print("MongoDB not available - cannot explain queries")
+        return
+    
+    for name, plan in explain_query_plans().items():
+        marker = '✅' if plan['uses_index'] else '⚠️'
+        print(f"{marker} {name}: {' -> '.join(stage for stage in plan['stages'] if stage)}")
+
+@app.cli.command('migrate-audio-blobs')
+def migrate_audio_blobs():
+    """Move inline base64 audio of existing drops into the audio blob store"""
+    if not init_mongodb():
+        print("MongoDB not available - nothing to migrate")
+        return
+    
+    for collection in (research_db.active_sounds, research_db.sound_drops_archive):
+        migrated = 0
+        for doc in collection.find({'audioData': {'$regex': '^data:'}}, {'_id': 1, 'audioData': 1}):
+            drop = externalize_audio({'audioData': doc['audioData']})
+            collection.update_one(
+                {'_id': doc['_id']},
+                {'$set': {key: drop[key] for key in ('audioBlobId', 'audioMimeType', 'audioSize', 'contentHash')},
+                 '$unset': {'audioData': ''}}
+            )
+            migrated += 1
+        if migrated and collection.name == 'sound_drops_archive':
+            bump_archive_revision()
+        print(f"{collection.name}: Migrated {migrated} drops to the audio blob store")
+
+@app.cli.command('backfill-content-hashes')
+def backfill_content_hashes():
+    """Add the content hash used for duplicate detection to active drops stored without one"""
+    if not init_mongodb():
+        print("MongoDB not available - nothing to backfill")
+        return
+    
+    collection = research_db.active_sounds
+    hashed, duplicates = 0, 0
+    for doc in collection.find({'contentHash': {'$exists': False}}, {'_id': 1, 'audioBlobId': 1, 'audioData': 1}):
+        if doc.get('audioBlobId'):
+            content_hash = doc['audioBlobId']
+        elif isinstance(doc.get('audioData'), str):
+            content_hash = hashlib.sha256(doc['audioData'].encode('utf-8')).hexdigest()
+        else:
+            continue
+        try:
+            collection.update_one({'_id': doc['_id']}, {'$set': {'contentHash': content_hash}})
+            hashed += 1
+        except DuplicateKeyError:
+            duplicates += 1  # An earlier copy of the same recording already owns the hash
+    print(f"{collection.name}: Hashed {hashed} drops, left {duplicates} historical duplicates unhashed")
+
+@app.cli.command('fingerprint-drops')
+@click.option('--batch-size', default=50, show_default=True, help='Drops decoded per batch')
+def fingerprint_drops(batch_size):
+    """Fingerprint active and archived drops that have none (or an outdated one), flagging near-duplicates of older drops"""
+    if not init_mongodb():
+        print("MongoDB not available - nothing to fingerprint")
+        return
+    
+    for collection in (research_db.active_sounds, research_db.sound_drops_archive):
+        fingerprinted, flagged, undecodable = 0, 0, 0
+        last_id = None
+        while True:
+            # Undecodable drops get fingerprint None, so an interrupted run picks up where it stopped
+            query = {'fingerprintVersion': {'$ne': FINGERPRINT_VERSION}}
+            if last_id is not None:
+                query['_id'] = {'$gt': last_id}
+            batch = list(collection.find(query, {'id': 1, 'audioBlobId': 1, 'audioData': 1}).sort('_id', 1).limit(batch_size))
+            if not batch:
+                break
+            for doc in batch:
+                opened = open_drop_audio(doc)
+                fingerprint = None
+                if opened is not None:
+                    with opened[1] as audio_file:
+                        fingerprint = audio_fingerprint(audio_file)
+                fields = fingerprint_fields(fingerprint) or {'fingerprint': None, 'fingerprintVersion': FINGERPRINT_VERSION}
+                if fingerprint is None:
+                    undecodable += 1
+                else:
+                    fingerprinted += 1
+                    match, distance = find_near_duplicate(
+                        fields['fingerprint'], fields['fingerprintBands'], older_than=doc.get('id')
+                    )
+                    if match is not None:
+                        fields.update({'nearDuplicateOf': match['id'], 'nearDuplicateDistance': distance})
+                        flagged += 1
+                # Saved one at a time, so later drops in the same batch can match this one
+                collection.update_one({'_id': doc['_id']}, {'$set': fields})
+            if collection.name == 'sound_drops_archive':
+                bump_archive_revision()
+            last_id = batch[-1]['_id']
+        print(f"{collection.name}: Fingerprinted {fingerprinted} drops ({flagged} near-duplicates), "
+              f"{undecodable} undecodable")
+
+@app.cli.command('extract-features')
+@click.option('--workers', default=os.cpu_count() or 1, show_default=True, help='Worker processes')
+@click.option('--batch-size', default=20, show_default=True, help='Drops read per batch')
+def extract_features(workers, batch_size):
+    """Extract acoustic features of archived drops into audio_features, resuming after the last checkpoint"""
+    if not init_mongodb():
+        print("MongoDB not available - nothing to extract")
+        return
+    
+    archive = research_db.sound_drops_archive
+    checkpoint = research_db.feature_jobs.find_one({'_id': 'archive_features'}) or {}
+    last_id = checkpoint.get('last_id') if checkpoint.get('version') == FEATURES_VERSION else None
+    print(f"Features: Resuming after {last_id}" if last_id else "Features: Starting from the beginning of the archive")
+    
+    def read_batch(after_id):
+        # Only references are read here; each worker opens the audio of its own drop
+        query = {'_id': {'$gt': after_id}} if after_id is not None else {}
+        docs = list(archive.find(query, {'id': 1, 'audioBlobId': 1}).sort('_id', 1).limit(batch_size))
+        jobs = [(doc, pool.submit(extract_drop_features, doc)) for doc in docs if doc.get('id') is not None]
+        return docs, jobs
+    
+    def save_batch(docs, jobs):
+        extracted_at = datetime.datetime.utcnow()
+        operations = []
+        extracted = 0
+        for doc, future in jobs:
+            try:
+                features = future.result()
+                fields = {**(features or {}), 'status': 'ok' if features else 'undecodable'}
+            except Exception as e:
+                # One bad recording must not stop the job; it is recorded and skipped
+                print(f"Features: Extraction failed for drop {doc['id']}: {e}")
+                features = None
+                fields = {'status': 'failed', 'error': str(e)}
+            extracted += features is not None
+            update = {'$set': {**fields, 'archive_id': doc['_id'], 'version': FEATURES_VERSION, 'extracted_at': extracted_at}}
+            if 'error' not in fields:
+                update['$unset'] = {'error': ''}
+            operations.append(UpdateOne({'_id': doc['id']}, update, upsert=True))
+        if operations:
+            research_db.audio_features.bulk_write(operations, ordered=False)
+        research_db.feature_jobs.update_one({'_id': 'archive_features'}, {
+            '$set': {'last_id': docs[-1]['_id'], 'version': FEATURES_VERSION, 'updated_at': extracted_at.isoformat()},
+            '$inc': {'processed': len(docs)}
+        }, upsert=True)
+        return extracted
+    
+    processed, extracted = 0, 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_feature_worker) as pool:
+        # The next batch is read from MongoDB while the workers decode the current one
+        pending = read_batch(last_id)
+        while pending[0]:
+            upcoming = read_batch(pending[0][-1]['_id'])
+            extracted += save_batch(*pending)
+            processed += len(pending[0])
+            print(f"Features: {processed} drops processed ({extracted} with features)")
+            pending = upcoming
+    print(f"Features: Done - {processed} drops processed, {extracted} with features")
+
+@app.cli.command('rebuild-stats')
+def rebuild_stats_command():
+    """Recount the research_stats counters from the active and archive collections"""
+    if not init_mongodb():
+        print("MongoDB not available - cannot rebuild stats")
+        return
+    rebuild_stats()
+
+@app.cli.command('bench-templates')
+@click.option('--iterations', default=200, show_default=True, help='Renders per variant')
+def bench_templates(iterations):
+    """Compare per-request page rendering: render_template_string vs the cached loader vs pre-rendered"""
+    dashboard_context = {
+        'current_drops': [{
+            'id': i, 'timestamp': 1700000000000 + i, 'theme': 'Urban Soundscapes', 'type': 'recorded',
+            'filename': f'recording_{i}.wav', 'context': 'Street noise', 'audioBlobId': '0' * 64,
+            'discussions': [{'id': 1, 'timestamp': 1700000000000, 'text': 'Nice', 'author': 'User'}]
+        } for i in range(ADMIN_PAGE_SIZE)],
+        'archived_drops': [], 'archived_count': 0, 'total_count': ADMIN_PAGE_SIZE, 'total_comments': ADMIN_PAGE_SIZE,
+        'next_cursor': None, 'page': 1, 'key': 'research2024'
+    }
+    variants = [
+        ('journal page', JOURNAL_TEMPLATE, 'journal.html', {}),
+        ('login page', ADMIN_LOGIN_TEMPLATE, 'admin_login.html', {}),
+        ('dashboard page', ADMIN_DASHBOARD_TEMPLATE, 'admin_dashboard.html', dashboard_context)
+    ]
+    
+    def per_request_ms(render):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            render()
+        return (time.perf_counter() - started) * 1000 / iterations
+    
+    with app.test_request_context():
+        for label, source, name, context in variants:
+            print(f"{label}:")
+            print(f"  render_template_string  {per_request_ms(lambda: render_template_string(source, **context)):8.3f} ms")
+            print(f"  cached template         {per_request_ms(lambda: render_template(name, **context)):8.3f} ms")
+            if not context:
+                print(f"  pre-rendered            {per_request_ms(lambda: prerendered_page(name)):8.3f} ms")
+
+if ARCHIVER_INTERVAL_SECONDS > 0:
+    start_archiver_thread(ARCHIVER_INTERVAL_SECONDS)
 
 # For Vercel deployment
 if __name__ == '__main__':
@@ -0,0 +1,31 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as sounddrop
+
+
+@pytest.fixture
+def fallback_dir(tmp_path, monkeypatch):
+    """Point the file fallback engine at an empty temporary directory"""
+    base = tmp_path / 'sound_drops'
+    monkeypatch.setattr(sounddrop, 'FALLBACK_DIR', str(base))
+    monkeypatch.setattr(sounddrop, 'FALLBACK_ARCHIVE_DIR', str(base / 'archive'))
+    monkeypatch.setattr(sounddrop, 'CHANGE_SEQ_FILE', str(base / 'change_seq'))
+    monkeypatch.setattr(sounddrop, 'TOMBSTONE_FILE', str(base / 'tombstones.ndjson'))
+    monkeypatch.setattr(sounddrop, 'STORAGE_FILE', str(tmp_path / 'sound_drops.json'))
+    monkeypatch.setattr(sounddrop, 'LEGACY_JOURNAL_FILE', str(tmp_path / 'sound_drops.journal'))
+    monkeypatch.setattr(sounddrop, 'shard_states', {})
+    monkeypatch.setattr(sounddrop, 'drop_shards', {})
+    return base
+
+
+@pytest.fixture
+def blob_dir(tmp_path, monkeypatch, fallback_dir):
+    """File-only blob store in a temporary directory, with MongoDB switched off"""
+    monkeypatch.setattr(sounddrop, 'USE_MONGODB_PRIMARY', False)
+    monkeypatch.setattr(sounddrop, 'AUDIO_BLOB_DIR', str(tmp_path / 'audio_blobs'))
+    return tmp_path / 'audio_blobs'
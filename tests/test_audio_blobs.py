@@ -0,0 +1,48 @@
+import io
+import os
+
+import app as sounddrop
+
+
+def store(data):
+    return sounddrop.store_audio_stream(io.BytesIO(data), 'audio/wav')[0]
+
+
+def test_orphaned_blob_is_kept_during_grace_period(blob_dir):
+    blob_id = store(b'rejected audio')
+    sounddrop.mark_orphaned_blob(blob_id)
+
+    assert sounddrop.sweep_orphaned_blobs() == 0
+    assert (blob_dir / blob_id).exists()
+
+
+def test_orphaned_blob_is_swept_after_grace_period(blob_dir, monkeypatch):
+    monkeypatch.setattr(sounddrop, 'BLOB_ORPHAN_GRACE_SECONDS', -1)
+    blob_id = store(b'rejected audio')
+    sounddrop.mark_orphaned_blob(blob_id)
+
+    assert sounddrop.sweep_orphaned_blobs() == 1
+    assert sorted(os.listdir(blob_dir)) == ['.lock']
+
+
+def test_reused_blob_is_not_swept(blob_dir, monkeypatch):
+    monkeypatch.setattr(sounddrop, 'BLOB_ORPHAN_GRACE_SECONDS', -1)
+    blob_id = store(b'same audio')
+    sounddrop.mark_orphaned_blob(blob_id)
+
+    # A concurrent ingest of the same bytes, whose drop is not inserted yet
+    assert store(b'same audio') == blob_id
+
+    assert sounddrop.sweep_orphaned_blobs() == 0
+    assert (blob_dir / blob_id).exists()
+
+
+def test_referenced_blob_is_unmarked_not_swept(blob_dir, monkeypatch):
+    monkeypatch.setattr(sounddrop, 'BLOB_ORPHAN_GRACE_SECONDS', -1)
+    blob_id = store(b'shared audio')
+    sounddrop.fallback_insert({'id': 1, 'timestamp': 1790000000000, 'audioBlobId': blob_id})
+    sounddrop.mark_orphaned_blob(blob_id)
+
+    assert sounddrop.sweep_orphaned_blobs() == 0
+    assert (blob_dir / blob_id).exists()
+    assert not (blob_dir / (blob_id + '.orphaned')).exists()
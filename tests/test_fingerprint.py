@@ -0,0 +1,91 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+import app as sounddrop
+
+RATE = 16000
+
+
+def voice(seed, seconds=4):
+    """Harmonic voice-like signal with a wandering pitch and syllable-like envelope"""
+    rng = np.random.RandomState(seed)
+    t = np.arange(int(RATE * seconds)) / RATE
+    f0 = 150 + 50 * np.sin(2 * np.pi * rng.rand() * t * 2)
+    signal = np.zeros_like(t)
+    for harmonic in range(1, 12):
+        phase = 2 * np.pi * harmonic * np.cumsum(f0) / RATE + rng.rand() * 6
+        signal += np.sin(phase) / harmonic * (1 + np.sin(2 * np.pi * (rng.rand() * 3 + 0.5) * t + harmonic))
+    envelope = (np.abs(np.convolve(rng.randn(len(t)), np.ones(2000) / 2000, 'same')) * 30).clip(0, 1)
+    # Digital silence around and between phrases, as in a journal recording
+    pause = np.zeros(int(RATE * 0.6))
+    signal = 0.2 * signal * envelope
+    return np.concatenate([pause, signal[:len(signal) // 2], pause, pause, signal[len(signal) // 2:], pause])
+
+
+def wav(samples, rate=RATE):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def fingerprint(samples, rate=RATE):
+    return sounddrop.fingerprint_fields(sounddrop.audio_fingerprint(wav(samples, rate)))
+
+
+def reencode(samples, seed, gain=0.7, noise_db=-66, rate=44100):
+    """Resampled, quieter copy with a low noise floor, as a re-encode or re-recording produces"""
+    times = np.arange(int(len(samples) * rate / RATE)) / rate
+    resampled = np.interp(times, np.arange(len(samples)) / RATE, samples)
+    return gain * resampled + np.random.RandomState(seed).randn(len(times)) * 10 ** (noise_db / 20)
+
+
+def distance(a, b):
+    return int(sounddrop.fingerprint_distances(a['fingerprint'], [b])[0])
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_reencoded_copy_still_matches(seed):
+    original = voice(seed)
+    copy = fingerprint(reencode(original, seed), 44100)
+
+    reference = fingerprint(original)
+
+    assert distance(reference, copy) <= sounddrop.FINGERPRINT_MAX_DISTANCE // 4
+    assert len(set(reference['fingerprintBands']) & set(copy['fingerprintBands'])) >= 8
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_unrelated_recordings_do_not_match(seed):
+    reference = fingerprint(voice(seed))
+    other = fingerprint(voice(seed + 50))
+
+    assert distance(reference, other) > sounddrop.FINGERPRINT_MAX_DISTANCE
+    # Shared silence must not make them index candidates of each other
+    assert not set(reference['fingerprintBands']) & set(other['fingerprintBands'])
+
+
+def test_find_near_duplicate_in_fallback_store(blob_dir):
+    original = voice(4)
+    for drop_id, samples in ((1, voice(5)), (2, original), (3, voice(6))):
+        sounddrop.fallback_insert({'id': drop_id, 'timestamp': 1790000000000 + drop_id, **fingerprint(samples)})
+    copy = fingerprint(reencode(original, 4), 44100)
+
+    match, match_distance = sounddrop.find_near_duplicate(copy['fingerprint'], copy['fingerprintBands'])
+
+    assert match['id'] == 2
+    assert match_distance <= sounddrop.FINGERPRINT_MAX_DISTANCE
+
+
+def test_outdated_fingerprints_are_not_compared(blob_dir):
+    fields = fingerprint(voice(7))
+    sounddrop.fallback_insert({'id': 1, 'timestamp': 1790000000000, **fields, 'fingerprintVersion': 1})
+
+    assert sounddrop.find_near_duplicate(fields['fingerprint'], fields['fingerprintBands']) == (None, None)
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+import app as sounddrop
+
+SOURCE_RATE = 44100
+TARGET_RATE = 16000
+
+
+def signal(seconds=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SOURCE_RATE * seconds)) / SOURCE_RATE
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t) + 0.1 * rng.standard_normal(len(t))
+    return tone.astype(np.float32)
+
+
+def resample(samples, block_sizes, source_rate=SOURCE_RATE, target_rate=TARGET_RATE):
+    """Resample samples fed in blocks of the given sizes (cycled), joined into one array"""
+    blocks, start, i = [], 0, 0
+    while start < len(samples):
+        size = block_sizes[i % len(block_sizes)]
+        blocks.append(samples[start:start + size])
+        start += size
+        i += 1
+    return np.concatenate(list(sounddrop.resample_blocks(iter(blocks), source_rate, target_rate)))
+
+
+@pytest.mark.parametrize('block_sizes', [
+    [4096],
+    [1000, 3],
+    [1],
+    [sounddrop.RESAMPLE_FILTER_TAPS - 1],
+    [50, 7, 333, 2, 1024],
+])
+def test_output_does_not_depend_on_block_boundaries(block_sizes):
+    samples = signal()
+    whole = resample(samples, [len(samples)])
+
+    split = resample(samples, block_sizes)
+
+    assert len(split) == len(whole)
+    np.testing.assert_allclose(split, whole, atol=1e-5)
+
+
+@pytest.mark.parametrize('source_rate, target_rate', [(44100, 16000), (48000, 16000), (22050, 8000)])
+def test_output_length_follows_rate_ratio(source_rate, target_rate):
+    samples = signal()
+
+    out = resample(samples, [777], source_rate, target_rate)
+
+    assert len(out) == (len(samples) - 1) * target_rate // source_rate + 1
+
+
+def test_upsampling_passes_blocks_through():
+    blocks = [np.ones(10, dtype=np.float32), np.zeros(5, dtype=np.float32)]
+
+    out = list(sounddrop.resample_blocks(iter(blocks), 8000, 16000))
+
+    assert out == blocks
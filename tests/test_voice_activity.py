@@ -0,0 +1,82 @@
+import io
+import wave
+
+import numpy as np
+import pytest
+
+import app as sounddrop
+
+RATE = 16000
+
+
+def wav(samples):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((np.clip(samples, -1, 1) * 32767).astype('<i2').tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def speech_in_silence():
+    """Two 'phrases' of syllable-modulated harmonics between seconds of digital silence"""
+    rng = np.random.RandomState(1)
+    t = np.arange(RATE * 2) / RATE
+    syllables = np.clip(np.sin(2 * np.pi * 4 * t), 0, 1)
+    phrase = 0.3 * syllables * sum(np.sin(2 * np.pi * 150 * h * t + rng.rand() * 6) / h for h in range(1, 10))
+    silence = np.zeros(RATE)
+    return np.concatenate([silence, phrase, silence, silence, silence, phrase, silence])
+
+
+@pytest.mark.parametrize('signal', [
+    0.3 * np.sin(2 * np.pi * 440 * np.arange(RATE * 4) / RATE),
+    0.1 * np.random.RandomState(0).randn(RATE * 4),
+], ids=['tone', 'noise'])
+def test_constant_level_signal_is_kept_whole(signal):
+    activity = sounddrop.voice_activity(wav(signal))
+
+    assert activity['speech'] is None
+    assert activity['keep'].all()
+
+
+def test_speech_in_silence_is_detected_and_trimmed(monkeypatch):
+    monkeypatch.setattr(sounddrop, 'MAX_PAUSE_SECONDS', 1.0)
+    samples = speech_in_silence()
+
+    activity = sounddrop.voice_activity(wav(samples))
+
+    frame_seconds = activity['frame'] / RATE
+    kept_seconds = activity['keep'].sum() * frame_seconds
+    assert 0.2 < activity['speech'].mean() < 0.6
+    # Leading and trailing silence go (up to the padding); the 3 s pause shrinks to 1 s
+    assert not activity['keep'][:int(0.5 / frame_seconds)].any()
+    assert not activity['keep'][-int(0.5 / frame_seconds):].any()
+    assert kept_seconds == pytest.approx(4 + 1 + 2 * sounddrop.VAD_PADDING_SECONDS, abs=0.2)
+
+
+def test_only_journal_recordings_are_trimmed(monkeypatch):
+    monkeypatch.setattr(sounddrop, 'TRIM_SILENCE', True)
+
+    assert sounddrop.journal_recording({'source': 'journal', 'type': 'recorded'})
+    assert not sounddrop.journal_recording({'source': 'journal', 'type': 'uploaded'})
+    assert not sounddrop.journal_recording({'type': 'recorded'})
+    monkeypatch.setattr(sounddrop, 'TRIM_SILENCE', False)
+    assert not sounddrop.journal_recording({'source': 'journal', 'type': 'recorded'})
+
+
+@pytest.mark.parametrize('source, trimmed', [('journal', True), (None, False)])
+def test_upload_trims_journal_recordings_only(blob_dir, monkeypatch, source, trimmed):
+    monkeypatch.setattr(sounddrop, 'TRIM_SILENCE', True)
+    monkeypatch.setattr(sounddrop, 'TRANSCODE_IN_BACKGROUND', False)
+    form = {'audio': (wav(speech_in_silence()), 'take.wav', 'audio/wav'), 'type': 'recorded'}
+    if source:
+        form['source'] = source
+
+    response = sounddrop.app.test_client().post('/api/upload-audio', data=form)
+
+    drop = response.get_json()['drop']
+    assert drop.get('silenceTrimmed', False) is trimmed
+    assert drop['speechRatio'] > 0
+    assert drop['audioDuration'] == (drop['trimmedDuration'] if trimmed else 9.0)